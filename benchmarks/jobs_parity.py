@@ -0,0 +1,94 @@
+"""
+Check that parallel one-vs-all training gives the same model as serial training.
+
+For every solver and dtype, the training set is prepared like logreg_train.py
+does, trained with --jobs 1 and with --jobs N, and the two model files are
+compared byte for byte. Exits with status 1 when any pair differs.
+
+Usage:
+    python benchmarks/jobs_parity.py [--jobs 4] [--dataset datasets/dataset_train.csv]
+"""
+
+
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from logreg_train import SOLVERS, normalize_array, train_one_vs_all  # noqa: E402
+from model import save_model  # noqa: E402
+from utils import load  # noqa: E402
+
+
+DATASET = "datasets/dataset_train.csv"
+DTYPES = ["float64", "float32"]
+
+
+def model_bytes(X, labels, classes, features, means, stds, jobs, solver, dtype, directory):
+    """
+    Train a one-vs-all model and return the content of its model file.
+
+    Parameters:
+        X (np.ndarray): Normalized features, as built by logreg_train.main().
+        labels (list of str): Class label of each sample.
+        classes (list of str): Sorted list of class names.
+        features (list of str): Feature names.
+        means (list of float): Mean of each feature.
+        stds (list of float): Standard deviation of each feature.
+        jobs (int): Number of worker processes.
+        solver (str): Solver of the classifiers.
+        dtype (str): Type of the saved model.
+        directory (str): Directory the model file is written to.
+
+    Returns:
+        bytes: The model file.
+    """
+    classifiers, _ = train_one_vs_all(X, labels, classes, jobs=jobs, solver=solver)
+    path = os.path.join(directory, f"{solver}-{dtype}-{jobs}.dslr")
+    save_model(classifiers, features, means, stds, filename=path, dtype=dtype)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def main():
+    """
+    Compare the serial and parallel models of every solver and dtype.
+    """
+    parser = argparse.ArgumentParser(description="Serial vs parallel training parity check.")
+    parser.add_argument("--dataset", default=DATASET, help=f"training set (default: {DATASET})")
+    parser.add_argument("--jobs", type=int, default=4,
+                        help="worker processes of the parallel runs (default: 4)")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'solver':<10}{'dtype':<10}  identical")
+    with tempfile.TemporaryDirectory() as directory:
+        for dtype in DTYPES:
+            data = load(args.dataset, float32=dtype == "float32")
+            if data is None:
+                sys.exit(1)
+            # same preparation as logreg_train.main(), layout included
+            X = np.nan_to_num(data.iloc[:, 6:].to_numpy(dtype=dtype), nan=0.0)
+            X, means, stds = normalize_array(X, dtype)
+            labels = data["Hogwarts House"].tolist()
+            classes = sorted(set(labels))
+            features = list(data.columns[6:])
+            for solver in SOLVERS:
+                serial, parallel = (model_bytes(X, labels, classes, features, means, stds,
+                                                jobs, solver, dtype, directory)
+                                    for jobs in (1, args.jobs))
+                failed |= serial != parallel
+                print(f"{solver:<10}{dtype:<10}  {'yes' if serial == parallel else 'NO'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.stderr.write("\ninteruption...\nbye!!!\n")
+        exit(1)
@@ -0,0 +1,89 @@
+"""
+Cold-start benchmark of the inference path.
+
+Each target module is imported in a fresh interpreter several times; the best
+import time (above a bare interpreter start) is compared to its budget, and
+the heavy modules it must not pull in are checked. Exits with status 1 when
+a budget is exceeded or a forbidden module is imported.
+
+Usage:
+    python benchmarks/startup.py [--runs 7] [--scale 1.0]
+"""
+
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> import budget in milliseconds, above `python -c pass`
+BUDGETS = {
+    "inference": 200,
+    "logreg_predict": 250,
+    "predict_server": 300,
+}
+FORBIDDEN = ["pandas", "matplotlib", "seaborn"]
+
+PROBE = """
+import sys, json
+import {module}
+print(json.dumps(sorted(m for m in {forbidden} if m in sys.modules)))
+"""
+
+
+def time_command(code, runs):
+    """
+    Run python code in fresh interpreters and return the best wall time.
+
+    Parameters:
+        code (str): Python source passed to `python -c`.
+        runs (int): Number of runs.
+
+    Returns:
+        tuple: best time in milliseconds (float), output of the last run (str)
+    """
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result.stdout
+
+
+def main():
+    """
+    Measure the import time of each module of BUDGETS and report regressions.
+    """
+    parser = argparse.ArgumentParser(description="Cold-start budget check of the inference path.")
+    parser.add_argument("--runs", type=int, default=7, help="runs per module (default: 7)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply every budget, for slower machines (default: 1.0)")
+    args = parser.parse_args()
+
+    baseline, _ = time_command("pass", args.runs)
+    failed = False
+    print(f"{'module':<18}{'import (ms)':>12}{'budget (ms)':>12}  heavy modules")
+    for module, budget in BUDGETS.items():
+        total, output = time_command(PROBE.format(module=module, forbidden=FORBIDDEN), args.runs)
+        elapsed = total - baseline
+        heavy = json.loads(output)
+        budget *= args.scale
+        ok = elapsed <= budget and not heavy
+        failed |= not ok
+        print(f"{module:<18}{elapsed:>12.1f}{budget:>12.0f}  {', '.join(heavy) or '-'}"
+              f"{'' if ok else '  FAIL'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.stderr.write("\ninteruption...\nbye!!!\n")
+        exit(1)
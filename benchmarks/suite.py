@@ -0,0 +1,376 @@
+"""
+Benchmark suite of the training, prediction and analysis code at scaled sizes.
+
+Every case is run on the training set replicated 1x, 10x, 100x and 1000x
+(each copy slightly jittered, so that sorts and medians see distinct values),
+or with --synthetic on as many students drawn by generate_dataset.py.
+For each case and scale the best wall time of a few runs and the peak memory
+allocated during one more run (tracemalloc) are recorded. The pure-Python
+cases (apply_functions, ft_levene, pearson_corr) take minutes at 1000x, so
+they stop at 100x unless --uncapped is given.
+
+Results are written as JSON, to be kept as a baseline (benchmarks/baseline.json
+is the one of the default run); `compare` flags the cases whose time or peak
+memory grew by more than a threshold, and exits with status 1 when there is
+any. Runs on different data (replicated vs synthetic) are not compared.
+
+Usage:
+    python benchmarks/suite.py run [--scales 1 10 100 1000] [--cases train predict]
+                                   [--output benchmarks/baseline.json]
+    python benchmarks/suite.py compare benchmarks/baseline.json current.json [--threshold 0.1]
+                                       [--min-delta-ms 1]
+"""
+
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from generate_dataset import fit_profile, generate_chunk  # noqa: E402
+from describe import (apply_functions, describe_columns,  # noqa: E402
+                      Count, Mean, Std, Min, Q1, median, Q3, Max)
+from histogram import ft_levene, levene_all  # noqa: E402
+from inference import predict  # noqa: E402
+from logreg_train import normalize_array, train_logistic_regression  # noqa: E402
+from scatter_plot import pearson_corr, correlation_matrix  # noqa: E402
+from utils import load  # noqa: E402
+
+
+DATASET = "datasets/dataset_train.csv"
+SCALES = [1, 10, 100, 1000]
+HOUSE = "Hogwarts House"
+LEVENE_COURSE = "Care of Magical Creatures"
+PEARSON_PAIR = ("Astronomy", "Defense Against the Dark Arts")
+# largest default scale of the pure-Python cases
+CAPPED = {"apply_functions": 100, "ft_levene": 100, "pearson_corr": 100}
+
+
+def scaled_dataset(data, scale, seed=42):
+    """
+    Replicate a dataset `scale` times, adding to each copy but the first a
+    small gaussian jitter (0.1% of the standard deviation of each course).
+
+    Parameters:
+        data (pd.DataFrame): The training set, courses from the 7th column on.
+        scale (int): Number of copies.
+        seed (int): Seed of the jitter.
+
+    Returns:
+        pd.DataFrame: The scaled dataset, with the house and course columns.
+    """
+    courses = data.iloc[:, 6:]
+    values = courses.to_numpy(dtype=float)
+    stds = np.nanstd(values, axis=0)
+    rng = np.random.default_rng(seed)
+    copies = [values] + [values + rng.normal(0, 1e-3, values.shape) * stds
+                         for _ in range(scale - 1)]
+    scaled = pd.DataFrame(np.vstack(copies), columns=courses.columns)
+    scaled.insert(0, HOUSE, np.tile(data[HOUSE].astype(str).to_numpy(), scale))
+    return scaled
+
+
+def synthetic_dataset(data, scale, seed=42):
+    """
+    Draw `scale` times as many synthetic students as the dataset has, from
+    its fitted per-house distributions (see generate_dataset.py).
+
+    Parameters:
+        data (pd.DataFrame): The training set, courses from the 7th column on.
+        scale (int): Size factor.
+        seed (int): Seed of the generation.
+
+    Returns:
+        pd.DataFrame: The synthetic dataset, with the house and course columns.
+    """
+    chunk = generate_chunk(fit_profile(data), len(data) * scale, np.random.SeedSequence(seed), 0)
+    return chunk[[HOUSE] + list(data.columns[6:])]
+
+
+def features(data):
+    """
+    Raw course matrix with missing scores as 0.0, as at training time.
+    """
+    return np.nan_to_num(data.iloc[:, 1:].to_numpy(dtype=float), nan=0.0)
+
+
+def setup_train(data):
+    """
+    Gradient descent of one class (Gryffindor), 100 epochs.
+    """
+    X, _, _ = normalize_array(features(data))
+    y = (data[HOUSE] == "Gryffindor").to_numpy()
+    return lambda: train_logistic_regression(X, y, epochs=100)
+
+
+def setup_predict(data):
+    """
+    Batch scoring of every row with a four-class model.
+    """
+    X = features(data)
+    normalized, means, stds = normalize_array(X)
+    classes = sorted(data[HOUSE].unique())
+    labels = data[HOUSE].to_numpy()
+    # weights of one short training per class: realistic scores, cheap setup
+    sample = slice(None, 1600)
+    weights, bias = zip(*[train_logistic_regression(normalized[sample],
+                                                    labels[sample] == c, epochs=50)
+                          for c in classes])
+    model = {"classes": classes, "weights": np.array(weights), "bias": np.array(bias),
+             "mean": np.array(means), "std": np.array(stds)}
+    return lambda: predict(X, model)
+
+
+def setup_apply_functions(data):
+    """
+    The per-column statistics of describe.py, one function at a time.
+    """
+    courses = data.iloc[:, 1:]
+    functions = [Count, Mean, Std, Min, Q1, median, Q3, Max]
+    return lambda: apply_functions(courses, functions)
+
+
+def setup_describe_columns(data):
+    """
+    The vectorized statistics of describe.py.
+    """
+    courses = data.iloc[:, 1:]
+    return lambda: describe_columns(courses)
+
+
+def setup_ft_levene(data):
+    """
+    Levene statistic of one course, in pure Python.
+    """
+    scores = data.dropna(subset=[LEVENE_COURSE])
+    groups = [group[LEVENE_COURSE].tolist() for _, group in scores.groupby(HOUSE)]
+    return lambda: ft_levene(groups)
+
+
+def setup_levene_all(data):
+    """
+    Vectorized Levene statistic of every course.
+    """
+    courses = list(data.columns[1:])
+    return lambda: levene_all(data, courses)
+
+
+def setup_pearson_corr(data):
+    """
+    Pearson coefficient of one pair, in pure Python.
+    """
+    pair = data[list(PEARSON_PAIR)].dropna()
+    x, y = pair[PEARSON_PAIR[0]], pair[PEARSON_PAIR[1]]
+    return lambda: pearson_corr(x, y)
+
+
+def setup_correlation_matrix(data):
+    """
+    Pairwise-complete correlation matrix of every course.
+    """
+    X = data.iloc[:, 1:].to_numpy(dtype=float)
+    return lambda: correlation_matrix(X, pairwise=True)
+
+
+# case -> setup(scaled dataset) returning the function to time
+CASES = {
+    "train": setup_train,
+    "predict": setup_predict,
+    "apply_functions": setup_apply_functions,
+    "describe_columns": setup_describe_columns,
+    "ft_levene": setup_ft_levene,
+    "levene_all": setup_levene_all,
+    "pearson_corr": setup_pearson_corr,
+    "correlation_matrix": setup_correlation_matrix,
+}
+
+
+def measure(function, repeat):
+    """
+    Time a function and measure the memory it allocates.
+
+    Parameters:
+        function (callable): The function to benchmark.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict: {"time_s": best wall time, "peak_mb": peak traced allocation}
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    # separate run: tracing slows allocations down and would skew the times
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time_s": best, "peak_mb": peak / 2 ** 20}
+
+
+def run(args):
+    """
+    Run the selected cases at the selected scales and save the results.
+    """
+    data = load(args.dataset)
+    if data is None:
+        sys.exit(1)
+    results = {}
+    print(f"{'case':<20}{'scale':>7}{'rows':>10}{'time (s)':>12}{'peak (MB)':>12}")
+    for scale in args.scales:
+        scaled = (synthetic_dataset if args.synthetic else scaled_dataset)(data, scale, args.seed)
+        for case in args.cases:
+            if not args.uncapped and scale > CAPPED.get(case, scale):
+                continue
+            result = measure(CASES[case](scaled), args.repeat)
+            result["rows"] = len(scaled)
+            results[f"{case}/{scale}x"] = result
+            print(f"{case:<20}{scale:>6}x{len(scaled):>10}{result['time_s']:>12.4f}"
+                  f"{result['peak_mb']:>12.1f}", flush=True)
+        del scaled
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "data": "synthetic" if args.synthetic else "replicated",
+            "uncapped": args.uncapped,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+def compare_results(baseline, current, threshold, min_delta=0.001):
+    """
+    Compare two reports case by case.
+
+    Parameters:
+        baseline (dict): Report of the baseline run ("meta" and "results").
+        current (dict): Report of the new run.
+        threshold (float): Relative growth counted as a regression (0.1 = 10%).
+        min_delta (float): Time growths below this many seconds are timer
+            noise, never regressions.
+
+    Returns:
+        list: (key, metric, baseline value, current value, relative change,
+            regressed) for each metric of each case present in both runs
+
+    Raises:
+        ValueError: If the runs were made on different data (replicated vs synthetic).
+    """
+    data = [report["meta"].get("data", "replicated") for report in (baseline, current)]
+    if data[0] != data[1]:
+        raise ValueError(f"cannot compare a {data[0]} run with a {data[1]} run")
+    baseline, current = baseline["results"], current["results"]
+    rows = []
+    for key in baseline:
+        if key not in current:
+            continue
+        for metric in ("time_s", "peak_mb"):
+            before, after = baseline[key][metric], current[key][metric]
+            change = (after - before) / before if before else 0.0
+            regressed = change > threshold and (metric != "time_s" or after - before > min_delta)
+            rows.append((key, metric, before, after, change, regressed))
+    return rows
+
+
+def compare(args):
+    """
+    Print the comparison of two result files, exit with status 1 on a regression.
+    """
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    try:
+        rows = compare_results(baseline, current, args.threshold, args.min_delta_ms / 1000)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    baseline, current = baseline["results"], current["results"]
+    print(f"{'case':<26}{'metric':<9}{'baseline':>12}{'current':>12}{'change':>9}")
+    for key, metric, before, after, change, regressed in rows:
+        print(f"{key:<26}{metric:<9}{before:>12.4f}{after:>12.4f}{change:>+9.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    missing = sorted(set(baseline) ^ set(current))
+    if missing:
+        print(f"not compared (in one run only): {', '.join(missing)}")
+    sys.exit(1 if any(row[-1] for row in rows) else 0)
+
+
+def parse_args():
+    """
+    Parse the command-line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark suite at scaled dataset sizes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--dataset", default=DATASET,
+                            help=f"dataset to scale (default: {DATASET})")
+    run_parser.add_argument("--scales", type=int, nargs="+", default=SCALES,
+                            help="dataset replication factors (default: 1 10 100 1000)")
+    run_parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES),
+                            help="cases to run (default: all)")
+    run_parser.add_argument("--uncapped", action="store_true",
+                            help="also run the pure-Python cases above 100x (minutes each)")
+    run_parser.add_argument("--repeat", type=int, default=3,
+                            help="timed runs per case, the best is kept (default: 3)")
+    run_parser.add_argument("--synthetic", action="store_true",
+                            help="benchmark on synthetic students drawn from the fitted "
+                                 "distributions of the dataset instead of jittered copies")
+    run_parser.add_argument("--seed", type=int, default=42,
+                            help="seed of the jitter or of the synthetic students")
+    run_parser.add_argument("--output", default=None, help="JSON file to write the results to")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline", help="JSON results of the reference run")
+    compare_parser.add_argument("current", help="JSON results of the new run")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative growth flagged as a regression (default: 0.1)")
+    compare_parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                                help="time growths below this are ignored as noise (default: 1)")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Run or compare benchmarks.
+    """
+    args = parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.stderr.write("\ninteruption...\nbye!!!\n")
+        exit(1)
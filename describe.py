@@ -1,11 +1,22 @@
 """
 This script computes descriptive statistics (count, mean, std deviation, quartiles, etc.)
 for numerical columns in a dataset. Usage: python describe.py dataset_train.csv
+
+With --approx, the file is streamed in chunks and the quartiles come from
+mergeable quantile sketches, so that files too big to sort can be described.
+A directory or glob of csv partitions is described the same way, one worker
+process per partition: python describe.py "data/daily-*.csv"
 """
 
+import argparse
+import glob
+import os
+import numpy as np
 import pandas as pd
 import sys
-from utils import load
+from concurrent.futures import ProcessPoolExecutor
+from sketch import KLLSketch, k_for_error
+from utils import load, iter_chunks, resolve_path
 
 
 def Mean(args: any):
@@ -141,6 +152,50 @@ def Count(args: int):
     return len(args)
 
 
+def moments(values):
+    """
+    Compute the count, mean and sum of squared deviations (M2) of each
+    column of a 2D array, ignoring NaN.
+
+    Parameters:
+        values (np.ndarray): A 2D array of numeric values (rows x columns).
+
+    Returns:
+        tuple: count, mean and M2 arrays, with one value per column.
+    """
+    values = np.asarray(values, dtype=float)
+    count = np.sum(~np.isnan(values), axis=0)
+    mean = np.divide(np.nansum(values, axis=0), count,
+                     out=np.zeros(values.shape[1]), where=count > 0)
+    M2 = np.nansum((values - mean) ** 2, axis=0)
+    return count, mean, M2
+
+
+def merge_moments(a, b):
+    """
+    Merge two (count, mean, M2) states computed on disjoint parts of the
+    same columns (parallel Welford update of Chan et al.).
+
+    Parameters:
+        a (tuple): First (count, mean, M2) state, or None.
+        b (tuple): Second (count, mean, M2) state.
+
+    Returns:
+        tuple: The (count, mean, M2) state of the union of both parts.
+            The variance is M2 / count.
+    """
+    if a is None:
+        return b
+    count_a, mean_a, M2_a = a
+    count_b, mean_b, M2_b = b
+    count = count_a + count_b
+    safe = np.maximum(count, 1)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / safe
+    M2 = M2_a + M2_b + delta ** 2 * count_a * count_b / safe
+    return count, mean, M2
+
+
 def apply_functions(data: pd.DataFrame, functions):
     """
     Apply a list of statistical functions to each column of a DataFrame.
@@ -165,24 +220,262 @@ def apply_functions(data: pd.DataFrame, functions):
     return pd.DataFrame(results)
 
 
+def describe_columns(data: pd.DataFrame):
+    """
+    Compute Count, Mean, Std, Min, 25%, 50%, 75% and Max of every numeric
+    column at once.
+
+    Each column is sorted a single time (NaN last) and all the quantiles are
+    read from that sort; the moments come from one pass of sums shifted by
+    the median, which keeps them accurate for large values. NaN are ignored
+    column by column. The quantiles follow the same index rules as Q1,
+    median and Q3.
+
+    Parameters:
+        data (pd.DataFrame): The input DataFrame.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the statistics as rows and the numeric
+            columns as columns.
+    """
+    numeric = data.select_dtypes("number")
+    values = numeric.to_numpy(dtype=float)
+    n_rows, n_cols = values.shape
+    ordered = np.sort(values, axis=0)
+    count = np.sum(~np.isnan(values), axis=0)
+    cols = np.arange(n_cols)
+
+    def at(index):
+        # value at a position of the sorted non-NaN values of each column
+        if n_rows == 0:
+            return np.full(n_cols, np.nan)
+        index = np.clip(index.astype(int), 0, n_rows - 1)
+        return np.where(count > 0, ordered[index, cols], np.nan)
+
+    med = at(np.round(count / 2))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shifted = values - med
+        s1 = np.nansum(shifted, axis=0)
+        s2 = np.nansum(shifted ** 2, axis=0)
+        mean = med + s1 / count
+        std = np.sqrt(np.maximum(s2 - s1 ** 2 / count, 0) / count)
+
+    stats = {
+        "Count": count.astype(float),
+        "Mean": mean,
+        "Std": std,
+        "Min": at(np.zeros(n_cols)),
+        "25%": at(count * 0.25),
+        "50%": med,
+        "75%": at(count * 0.75),
+        "Max": at(count - 1),
+    }
+    return pd.DataFrame(stats, index=numeric.columns).T
+
+
+def summarize_chunk(values, k=200, seed=None):
+    """
+    Compute the mergeable partial aggregates of a chunk of numeric columns:
+    count, mean and M2 for the moments, and one quantile sketch per column,
+    which also holds its exact min and max.
+
+    Parameters:
+        values (np.ndarray): A 2D array of numeric values (rows x columns).
+        k (int): Size of the quantile sketches, see sketch.KLLSketch.
+        seed (int or None): Seed of the sketches.
+
+    Returns:
+        dict: {"moments": (count, mean, M2), "sketches": list of KLLSketch}
+    """
+    values = np.asarray(values, dtype=float)
+    sketches = []
+    for col in values.T:
+        sketch = KLLSketch(k, seed)
+        sketch.update(col)
+        sketches.append(sketch)
+    return {"moments": moments(values), "sketches": sketches}
+
+
+def merge_summaries(a, b):
+    """
+    Merge the partial aggregates of two disjoint parts of the same columns.
+
+    Parameters:
+        a (dict): Partial aggregates returned by summarize_chunk(), or None.
+        b (dict): Partial aggregates returned by summarize_chunk().
+
+    Returns:
+        dict: The partial aggregates of both parts.
+    """
+    if a is None:
+        return b
+    return {
+        "moments": merge_moments(a["moments"], b["moments"]),
+        "sketches": [sa.merge(sb) for sa, sb in zip(a["sketches"], b["sketches"])],
+    }
+
+
+def summary_table(summary, columns):
+    """
+    Build the describe table from merged partial aggregates.
+
+    Parameters:
+        summary (dict): Partial aggregates, see summarize_chunk().
+        columns (list of str): Name of each column.
+
+    Returns:
+        pd.DataFrame: A DataFrame with the statistics as rows and the columns
+            as columns, like describe_columns().
+    """
+    count, mean, M2 = summary["moments"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(M2 / count)
+    quartiles = np.array([s.quantiles([0.25, 0.5, 0.75]) for s in summary["sketches"]])
+    stats = {
+        "Count": count.astype(float),
+        "Mean": np.where(count > 0, mean, np.nan),
+        "Std": std,
+        "Min": [s.min for s in summary["sketches"]],
+        "25%": quartiles[:, 0],
+        "50%": quartiles[:, 1],
+        "75%": quartiles[:, 2],
+        "Max": [s.max for s in summary["sketches"]],
+    }
+    return pd.DataFrame(stats, index=columns).T
+
+
+def summarize_partition(path, chunksize=100000, eps=0.01, seed=0):
+    """
+    Stream one csv file and reduce its course columns to partial aggregates.
+
+    Parameters:
+        path (str): Path to the csv file.
+        chunksize (int): Number of rows read at a time.
+        eps (float): Target rank error of the quartiles, as a fraction of the count.
+        seed (int or None): Seed of the sketches.
+
+    Returns:
+        tuple: column names (list of str), partial aggregates (dict, see summarize_chunk())
+    """
+    summary = None
+    columns = None
+    for chunk in iter_chunks(path, chunksize):
+        # delete the 6 first columns
+        chunk = chunk.iloc[:, 6:]
+        if columns is None:
+            columns = list(chunk.select_dtypes("number").columns)
+        summary = merge_summaries(summary, summarize_chunk(chunk[columns], k_for_error(eps), seed))
+    return columns, summary
+
+
+def describe_partitions(paths, jobs=None, chunksize=100000, eps=0.01, seed=0):
+    """
+    Describe the course columns of several csv partitions of the same table.
+
+    Each partition is streamed and reduced to partial aggregates in a worker
+    process (map), then the aggregates are merged into a single table
+    (reduce). No process ever holds more than one chunk of rows.
+
+    Parameters:
+        paths (list of str): Paths to the csv files.
+        jobs (int or None): Number of worker processes, None for one per core.
+        chunksize (int): Number of rows read at a time.
+        eps (float): Target rank error of the quartiles, as a fraction of the count.
+        seed (int or None): Seed of the sketches.
+
+    Returns:
+        pd.DataFrame: The describe table.
+    """
+    if jobs == 1 or len(paths) == 1:
+        partials = [summarize_partition(path, chunksize, eps, seed) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            partials = list(pool.map(summarize_partition, paths, [chunksize] * len(paths),
+                                     [eps] * len(paths), [seed] * len(paths)))
+
+    columns, summary = partials[0]
+    for path, (partition_columns, partial) in zip(paths[1:], partials[1:]):
+        if partition_columns != columns:
+            raise ValueError(f"{path}: columns differ from {paths[0]}")
+        summary = merge_summaries(summary, partial)
+    return summary_table(summary, columns)
+
+
+def describe_stream(path, chunksize=100000, eps=0.01, seed=0):
+    """
+    Describe the course columns of a csv file in one streaming pass.
+
+    Count, Mean, Std, Min and Max are exact; the quartiles are approximated
+    by mergeable quantile sketches, with a rank error of about eps. Memory
+    depends on chunksize and eps, not on the number of rows.
+
+    Parameters:
+        path (str): Path to the csv file.
+        chunksize (int): Number of rows read at a time.
+        eps (float): Target rank error of the quartiles, as a fraction of the count.
+        seed (int or None): Seed of the sketches.
+
+    Returns:
+        pd.DataFrame: The describe table.
+    """
+    return describe_partitions([path], 1, chunksize, eps, seed)
+
+
+def find_partitions(path):
+    """
+    List the csv files designated by a file, a directory or a glob pattern.
+
+    Parameters:
+        path (str): A csv file, a directory of csv files, or a glob such as
+            "data/2024-*.csv".
+
+    Returns:
+        list of str: The sorted paths of the partitions.
+    """
+    resolved = resolve_path(path)
+    if os.path.isdir(resolved):
+        paths = sorted(glob.glob(os.path.join(resolved, "*.csv*")))
+    elif glob.has_magic(path):
+        paths = sorted(glob.glob(resolved))
+    else:
+        return [path]
+    if not paths:
+        raise ValueError(f"no csv file matches {path}")
+    return paths
+
+
 def main():
     """
     Main function that loads the dataset, removes non-numerical columns,
     applies descriptive statistics functions, and prints the result.
     """
     try:
-        assert len(sys.argv) == 2, "Invalid number of parameter"
-        data: pd.DataFrame = load(sys.argv[1])
-        functions = [Count, Mean, Std, Min, Q1, median, Q3, Max]
-        Q1.__name__ = "25%"
-        median.__name__ = "50%"
-        Q3.__name__ = "75%"
+        parser = argparse.ArgumentParser(description="Describe the courses of a dataset.")
+        parser.add_argument("dataset",
+                            help="csv file, directory of csv partitions or glob pattern")
+        parser.add_argument("--approx", action="store_true",
+                            help="stream the file and approximate the quartiles with sketches")
+        parser.add_argument("--eps", type=float, default=0.01,
+                            help="rank error of the approximate quartiles (default: 0.01)")
+        parser.add_argument("--chunksize", type=int, default=100000,
+                            help="rows read at a time in approximate mode (default: 100000)")
+        parser.add_argument("--jobs", type=int, default=None,
+                            help="worker processes for partitions (default: one per core)")
+        args = parser.parse_args()
+
+        # a directory or a glob is always reduced from per-partition aggregates
+        partitions = find_partitions(args.dataset)
+        if args.approx or partitions != [args.dataset]:
+            print(describe_partitions(partitions, args.jobs, args.chunksize, args.eps))
+            return
+
+        data: pd.DataFrame = load(args.dataset)
 
         # delete the 6 first columns
         data = data.iloc[:, 6:]
 
-        # apply functions and print DataFrame
-        result_df = apply_functions(data, functions)
+        # compute every statistic of every column and print DataFrame
+        result_df = describe_columns(data)
         print(result_df)
 
     except Exception as e:
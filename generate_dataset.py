@@ -0,0 +1,224 @@
+"""
+This script generates synthetic Hogwarts datasets of any size with the schema
+and the statistics of a real one, to load-test the other scripts.
+
+From the source dataset it fits, for each house: its share of the students,
+the mean vector and covariance matrix of the course scores, the rate of
+missing scores of each course and the share of each best hand. Names are
+drawn from the names of the source, birthdays uniformly between its first
+and last birthday.
+
+Rows are generated in chunks, each from its own child of a single
+SeedSequence, so the output only depends on the seed and the chunk size,
+not on the number of worker processes. Chunks are written in order as they
+come, so memory depends on the chunk size, not on the number of rows.
+
+Usage:
+    python generate_dataset.py --rows 1000000 --output big.csv [--seed 42] [--jobs 4]
+"""
+
+
+import argparse
+import gzip
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from utils import load, read_dataset, resolve_path
+
+
+HOUSE = "Hogwarts House"
+
+
+def fit_profile(data: pd.DataFrame):
+    """
+    Fit the per-house distributions of a dataset.
+
+    Parameters:
+        data (pd.DataFrame): Source dataset, with the course scores from the 7th column on.
+
+    Returns:
+        dict: The profile: "columns", "courses", "houses", "weights" (share of
+            each house), "means" (H x D), "transforms" (H x D x D, such that
+            mean + transform @ z follows the house covariance for a standard
+            normal z), "nan_rates" (H x D), "hands", "hand_rates" (H x hands),
+            "first_names", "last_names", "birthdays" (first and last, as days)
+    """
+    courses = list(data.columns[6:])
+    labeled = data.dropna(subset=[HOUSE])
+    houses = sorted(labeled[HOUSE].unique())
+    hands = sorted(data["Best Hand"].dropna().unique())
+    means, transforms, nan_rates, hand_rates, weights = [], [], [], [], []
+    for house in houses:
+        group = labeled[labeled[HOUSE] == house]
+        scores = group[courses].to_numpy(dtype=float)
+        complete = scores[~np.isnan(scores).any(axis=1)]
+        means.append(complete.mean(axis=0))
+        # eigen decomposition: the covariance is singular when two courses
+        # are perfectly correlated, where a Cholesky factor does not exist
+        values, vectors = np.linalg.eigh(np.cov(complete, rowvar=False))
+        transforms.append(vectors * np.sqrt(np.clip(values, 0, None)))
+        nan_rates.append(np.isnan(scores).mean(axis=0))
+        hand_rates.append([np.mean(group["Best Hand"] == hand) for hand in hands])
+        weights.append(len(group) / len(labeled))
+    birthdays = pd.to_datetime(data["Birthday"], errors="coerce").dropna()
+    epoch = pd.Timestamp("1970-01-01")
+    return {
+        "columns": list(data.columns),
+        "courses": courses,
+        "houses": houses,
+        "weights": np.array(weights),
+        "means": np.array(means),
+        "transforms": np.array(transforms),
+        "nan_rates": np.array(nan_rates),
+        "hands": hands,
+        "hand_rates": np.array(hand_rates),
+        "first_names": data["First Name"].dropna().unique().tolist(),
+        "last_names": data["Last Name"].dropna().unique().tolist(),
+        "birthdays": ((birthdays.min() - epoch).days, (birthdays.max() - epoch).days),
+    }
+
+
+def generate_chunk(profile, rows, seed, start, labeled=True):
+    """
+    Generate a chunk of students.
+
+    Parameters:
+        profile (dict): The profile returned by fit_profile().
+        rows (int): Number of students.
+        seed (np.random.SeedSequence): Seed of this chunk.
+        start (int): Index of the first student.
+        labeled (bool): Fill the house column; leave it empty otherwise,
+            like in a test set.
+
+    Returns:
+        pd.DataFrame: The chunk, with the columns of the source.
+    """
+    rng = np.random.default_rng(seed)
+    house = rng.choice(len(profile["houses"]), size=rows, p=profile["weights"])
+    z = rng.standard_normal((rows, len(profile["courses"])))
+    scores = profile["means"][house] + np.einsum("nij,nj->ni", profile["transforms"][house], z)
+    scores[rng.random(scores.shape) < profile["nan_rates"][house]] = np.nan
+
+    cumulative = np.cumsum(profile["hand_rates"], axis=1)[house]
+    hand = (rng.random((rows, 1)) > cumulative).sum(axis=1)
+    hand = np.minimum(hand, len(profile["hands"]) - 1)
+    first, last = profile["birthdays"]
+    days = rng.integers(first, last + 1, size=rows)
+
+    chunk = pd.DataFrame({
+        "Index": np.arange(start, start + rows),
+        HOUSE: np.asarray(profile["houses"], dtype=object)[house] if labeled else np.nan,
+        "First Name": np.asarray(profile["first_names"], dtype=object)[
+            rng.integers(len(profile["first_names"]), size=rows)],
+        "Last Name": np.asarray(profile["last_names"], dtype=object)[
+            rng.integers(len(profile["last_names"]), size=rows)],
+        "Birthday": (np.datetime64("1970-01-01") + days.astype("timedelta64[D]")).astype(str),
+        "Best Hand": np.asarray(profile["hands"], dtype=object)[hand],
+    })
+    for j, course in enumerate(profile["courses"]):
+        chunk[course] = scores[:, j]
+    return chunk[profile["columns"]]
+
+
+def _chunk_csv(profile, rows, seed, start, labeled):
+    """
+    Generate a chunk and format it as csv lines, without header.
+    """
+    return generate_chunk(profile, rows, seed, start, labeled).to_csv(index=False, header=False)
+
+
+def generate(profile, rows, output, seed=42, chunksize=100000, jobs=1, labeled=True):
+    """
+    Write a synthetic dataset to a csv file, gzip-compressed if its name ends with .gz.
+
+    Parameters:
+        profile (dict): The profile returned by fit_profile().
+        rows (int): Number of students.
+        output (str): Path of the csv file.
+        seed (int): Seed of the whole dataset.
+        chunksize (int): Rows generated per task.
+        jobs (int): Number of worker processes.
+        labeled (bool): Fill the house column.
+    """
+    starts = list(range(0, rows, chunksize))
+    sizes = [min(chunksize, rows - start) for start in starts]
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    tasks = ([profile] * len(starts), sizes, seeds, starts, [labeled] * len(starts))
+
+    partial = output + ".part"
+    opener = gzip.open if output.endswith(".gz") else open
+    try:
+        with opener(partial, "wt", newline="") as f:
+            f.write(",".join(profile["columns"]) + "\n")
+            if jobs > 1:
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    for lines in pool.map(_chunk_csv, *tasks):
+                        f.write(lines)
+            else:
+                for lines in map(_chunk_csv, *tasks):
+                    f.write(lines)
+        os.replace(partial, output)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def parse_args():
+    """
+    Parse the command-line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic Hogwarts dataset.")
+    parser.add_argument("--source", default="datasets/dataset_train.csv",
+                        help="dataset to imitate (default: datasets/dataset_train.csv)")
+    parser.add_argument("--rows", type=int, default=100000,
+                        help="number of students (default: 100000)")
+    parser.add_argument("--output", default="datasets/dataset_synthetic.csv",
+                        help="csv file to write, compressed if it ends with .gz; relative "
+                             "paths are resolved from the directory of the scripts, like "
+                             "the datasets read by the other scripts "
+                             "(default: datasets/dataset_synthetic.csv)")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the dataset (default: 42)")
+    parser.add_argument("--chunksize", type=int, default=100000,
+                        help="rows generated per task (default: 100000)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--unlabeled", action="store_true",
+                        help="leave the house column empty, like a test set")
+    parser.add_argument("--cache", action="store_true",
+                        help="also parse the output into the binary dataset cache, "
+                             "so that the first load by another script is fast")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Fit the source dataset and write the synthetic one.
+    """
+    args = parse_args()
+    try:
+        source = load(args.source)
+        if source is None:
+            return
+        # resolved like the datasets the other scripts read, so that the
+        # same relative path finds it again
+        output = resolve_path(args.output)
+        generate(fit_profile(source), args.rows, output, args.seed,
+                 args.chunksize, args.jobs, not args.unlabeled)
+        print(f"{args.rows} students written to {output}")
+        if args.cache:
+            read_dataset(output, jobs=args.jobs)
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.stderr.write("\ninteruption...\nbye!!!\n")
+        exit(1)
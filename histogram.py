@@ -8,11 +8,14 @@ Usage:
 """
 
 
+import math
+import os
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import sys
-from utils import load
-from describe import Std, median, Mean, Min
+from utils import load, iter_chunks, resolve_path, file_hash
+from describe import Std, median, Mean
 
 
 house_colors = {
@@ -21,6 +24,8 @@ house_colors = {
     "Ravenclaw": "#0F1D4A",
     "Slytherin": "#1A472A"
 }
+BINS = 20
+HISTOGRAM_CACHE = ".cache/histograms"
 
 
 def ft_levene(groups):
@@ -71,6 +76,123 @@ def ft_levene(groups):
 
     return(W)
 
+def betainc(a, b, x):
+    """
+    Regularized incomplete beta function I_x(a, b), evaluated with the
+    continued fraction of Numerical Recipes (modified Lentz method).
+
+    Parameters:
+        a (float): First shape parameter (> 0).
+        b (float): Second shape parameter (> 0).
+        x (float): Upper bound of the integral, between 0 and 1.
+
+    Returns:
+        float: I_x(a, b).
+    """
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        # the fraction converges fast below the mean only: use the symmetry
+        return 1.0 - betainc(b, a, 1.0 - x)
+    log_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                 + a * math.log(x) + b * math.log(1 - x))
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 500):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if abs(c * d - 1.0) < 1e-15:
+            break
+    return math.exp(log_front) * fraction / a
+
+
+def f_pvalue(W, dfn, dfd):
+    """
+    Survival function of the F distribution: P(F(dfn, dfd) > W).
+
+    Parameters:
+        W (float): The statistic.
+        dfn (int): Degrees of freedom of the numerator.
+        dfd (int): Degrees of freedom of the denominator.
+
+    Returns:
+        float: The p-value, NaN if W is not finite.
+    """
+    if not np.isfinite(W) or dfn <= 0 or dfd <= 0:
+        return float("nan")
+    return betainc(dfd / 2, dfn / 2, dfd / (dfd + dfn * max(W, 0.0)))
+
+
+def levene_all(data: pd.DataFrame, features, col_house="Hogwarts House"):
+    """
+    Brown-Forsythe variant of Levene's test for every course at once.
+
+    The rows are grouped by house a single time; the absolute deviations
+    from the median of each (house, course) and their group sums are then
+    computed for all the courses together with matrix products. NaN scores
+    are ignored course by course, and rows without a house are dropped.
+
+    Unlike ft_levene, the median of an even-sized group is the mean of its
+    two middle values and the grand mean of the deviations is weighted by
+    the group sizes, so W follows F(k - 1, N - k) and gives a p-value.
+
+    Parameters:
+        data (pd.DataFrame): The dataset containing students' scores and house information.
+        features (list of str): The courses to test.
+        col_house (str): The column name representing the Hogwarts house (default: "Hogwarts House").
+
+    Returns:
+        pd.DataFrame: One row per course with the statistic "W" and its "p-value",
+            sorted from the most to the least homogenous course.
+    """
+    houses = data[col_house]
+    has_house = houses.notna().to_numpy()
+    codes, groups = pd.factorize(houses[has_house], sort=True)
+    values = data.loc[has_house, list(features)].to_numpy(dtype=float)
+    k = len(groups)
+
+    # absolute deviations from the median of each house, for every course
+    Z = np.empty_like(values)
+    for g in range(k):
+        in_group = codes == g
+        ordered = np.sort(values[in_group], axis=0)  # NaN last
+        count = np.sum(~np.isnan(ordered), axis=0)
+        cols = np.arange(values.shape[1])
+        low = ordered[np.maximum(count - 1, 0) // 2, cols]
+        high = ordered[count // 2, cols]
+        Z[in_group] = np.abs(values[in_group] - (low + high) / 2)
+
+    # per (house, course) counts, sums and sums of squares in three products
+    observed = ~np.isnan(Z)
+    Z = np.where(observed, Z, 0.0)
+    onehot = (codes[:, None] == np.arange(k)).astype(float).T
+    n_g = onehot @ observed
+    sum_g = onehot @ Z
+    sq_g = onehot @ Z ** 2
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n_total = n_g.sum(axis=0)
+        mean_g = sum_g / n_g
+        grand_mean = sum_g.sum(axis=0) / n_total
+        between = np.nansum(n_g * (mean_g - grand_mean) ** 2, axis=0)
+        within = np.nansum(sq_g - n_g * mean_g ** 2, axis=0)
+        k_obs = np.sum(n_g > 0, axis=0)
+        W = (n_total - k_obs) / (k_obs - 1) * between / within
+
+    p_values = [f_pvalue(w, kj - 1, n - kj) for w, kj, n in zip(W, k_obs, n_total)]
+    result = pd.DataFrame({"W": W, "p-value": p_values}, index=list(features))
+    return result.sort_values("W")
+
+
 def find_homogenous_course(data: pd.DataFrame, col_course, col_house="Hogwarts House"):
     """
     Determine the homogeneity of a course across Hogwarts houses using Levene's test.
@@ -105,23 +227,144 @@ def find_homogenous_course(data: pd.DataFrame, col_course, col_house="Hogwarts H
     return res
 
 
-def plot_histograms(data: pd.DataFrame):
+def bin_counts(values, house, n_houses, edges):
+    """
+    Count the values of every feature for every house on shared bin edges,
+    all at once with a single bincount over (house, feature, bin) codes.
+
+    Parameters:
+        values (np.ndarray): Feature matrix (n x p), NaN for missing values.
+        house (np.ndarray): House number of each row (n), -1 for no house.
+        n_houses (int): Number of houses.
+        edges (np.ndarray): Bin edges of each feature (p x bins + 1).
+
+    Returns:
+        np.ndarray: Counts (n_houses x p x bins). Like np.histogram, the last
+            bin includes its right edge.
+    """
+    p, bins = edges.shape[0], edges.shape[1] - 1
+    low, high = edges[:, 0], edges[:, -1]
+    width = np.where(high > low, high - low, 1.0)
+    with np.errstate(invalid="ignore"):
+        index = np.floor((values - low) / width * bins)
+    valid = ~np.isnan(index) & (index >= 0) & (index <= bins) & (house[:, None] >= 0)
+    index = np.clip(np.nan_to_num(index), 0, bins - 1).astype(np.int64)
+    # rounding may put a value next to an edge in the neighbouring bin
+    rows = np.arange(p)
+    index -= (index > 0) & (values < edges[rows, index])
+    index += (index < bins - 1) & (values >= edges[rows, index + 1])
+    codes = (house[:, None] * p + np.arange(p)) * bins + index
+    counts = np.bincount(codes[valid], minlength=n_houses * p * bins)
+    return counts.reshape(n_houses, p, bins)
+
+
+def compute_histograms(path, bins=BINS, chunksize=100000, col_house="Hogwarts House"):
+    """
+    Bin every course of a dataset by house, reading it chunk by chunk.
+
+    A first pass finds the houses and the range of each course, a second
+    pass accumulates the counts, so the whole dataset is never in memory.
+
+    Parameters:
+        path (str): Path to the dataset.
+        bins (int): Number of bins per course.
+        chunksize (int): Rows read at a time.
+        col_house (str): Column name for the house grouping.
+
+    Returns:
+        dict: {"houses", "features", "edges" (p x bins + 1),
+            "counts" (houses x p x bins)}
+    """
+    features, houses = None, set()
+    low = high = None
+    for chunk in iter_chunks(path, chunksize):
+        if features is None:
+            features = list(chunk.iloc[:, 6:].select_dtypes("number").columns)
+        values = chunk[features].to_numpy(dtype=float)
+        houses.update(chunk[col_house].dropna().unique())
+        with np.errstate(all="ignore"):
+            chunk_low, chunk_high = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+        low = chunk_low if low is None else np.fmin(low, chunk_low)
+        high = chunk_high if high is None else np.fmax(high, chunk_high)
+    houses = sorted(houses)
+    # empty or constant courses get a unit range so that their edges increase
+    low = np.nan_to_num(low)
+    high = np.where(np.nan_to_num(high) > low, np.nan_to_num(high), low + 1)
+    edges = low[:, None] + (high - low)[:, None] * np.linspace(0, 1, bins + 1)
+    edges[:, -1] = high
+
+    counts = np.zeros((len(houses), len(features), bins), dtype=np.int64)
+    for chunk in iter_chunks(path, chunksize):
+        house = pd.Categorical(chunk[col_house], categories=houses).codes.astype(np.int64)
+        counts += bin_counts(chunk[features].to_numpy(dtype=float), house, len(houses), edges)
+    return {"houses": houses, "features": features, "edges": edges, "counts": counts}
+
+
+def load_histograms(path, bins=BINS, chunksize=100000, cache_dir=HISTOGRAM_CACHE):
+    """
+    Return the binned histograms of a dataset, computing them only the first
+    time: they are saved to cache_dir under the hash of the dataset content,
+    so plots are redrawn without reading the rows again.
+
+    Parameters:
+        path (str): Path to the dataset.
+        bins (int): Number of bins per course.
+        chunksize (int): Rows read at a time when computing.
+        cache_dir (str): Directory of the cached histograms.
+
+    Returns:
+        dict: {"houses", "features", "edges", "counts"}, see compute_histograms().
+    """
+    cache_file = os.path.join(resolve_path(cache_dir),
+                              f"{file_hash(resolve_path(path))}-{bins}.npz")
+    if os.path.exists(cache_file):
+        with np.load(cache_file) as saved:
+            return {"houses": saved["houses"].tolist(), "features": saved["features"].tolist(),
+                    "edges": saved["edges"], "counts": saved["counts"]}
+    histograms = compute_histograms(path, bins, chunksize)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    # written aside and renamed, so a reader never sees a partial file
+    with open(cache_file + ".part", "wb") as f:
+        np.savez(f, houses=np.array(histograms["houses"], dtype=str),
+                 features=np.array(histograms["features"], dtype=str),
+                 edges=histograms["edges"], counts=histograms["counts"])
+    os.replace(cache_file + ".part", cache_file)
+    return histograms
+
+
+def draw_histogram(ax, histograms, feature):
+    """
+    Draw the per-house histograms of a course from its binned counts.
+
+    Parameters:
+        ax (matplotlib.axes.Axes): The axes to draw on.
+        histograms (dict): The histograms returned by load_histograms().
+        feature (str): The course to draw.
+    """
+    j = histograms["features"].index(feature)
+    for h, house in enumerate(histograms["houses"]):
+        ax.stairs(
+            histograms["counts"][h, j],
+            histograms["edges"][j],
+            fill=True,
+            alpha=0.6,
+            label=house,
+            color=house_colors.get(house, 'pink'))
+
+
+def plot_histograms(histograms):
     """
     Display histograms of all numerical features, grouped by Hogwarts house.
 
     Parameters:
-        data (pd.DataFrame): The dataset containing student scores and house information.
+        histograms (dict): The binned counts returned by load_histograms().
 
     Side effects:
         - Displays a grid of histograms for all features.
         - Saves the resulting figure to 'img/histo_all_course.png'.
     """
 
-    houses = data["Hogwarts House"].unique()
-    features = [
-        col for col in data.columns if col not in [
-            "Index", "Hogwarts House", "First Name", "Last Name", "Birthday",
-            "Best Hand"]]
+    features = histograms["features"]
 
     num_features = len(features)
     cols = 3
@@ -132,60 +375,49 @@ def plot_histograms(data: pd.DataFrame):
 
     for i, feature in enumerate(features):
         ax = axes[i]
-        for house in houses:
-            house_data = data[data["Hogwarts House"] == house][feature].dropna()
-            ax.hist(
-                house_data,
-                alpha=0.6,
-                bins=20,
-                label=house,
-                color=house_colors.get(house, 'pink'))
+        draw_histogram(ax, histograms, feature)
 
         ax.set_title(feature)
         ax.set_xlabel("Score")
         ax.set_ylabel("Count")
         ax.grid(True)
-        ax.legend()
+        if histograms["houses"]:
+            ax.legend()
 
     # remove the grid if features < rows * cols
     for j in range(i + 1, len(axes)):
         fig.delaxes(axes[j])
 
     plt.tight_layout()
+    os.makedirs("img", exist_ok=True)
     plt.savefig("img/histo_all_course.png")
     plt.show()
 
 
-def plot_histograms_homogenous(course, data):
+def plot_histograms_homogenous(course, histograms):
     """
     Plot the histogram of the most homogenous course, grouped by Hogwarts house.
 
     Parameters:
         course (str): The name of the course identified as most homogenous.
-        data (pd.DataFrame): The dataset containing student scores and house information.
+        histograms (dict): The binned counts returned by load_histograms().
 
     Side effects:
         - Displays and saves a histogram figure for the specified course.
         - Saves the plot to 'img/homogenous_course.png'.
     """
 
-    houses = data["Hogwarts House"].unique()
     fig, ax = plt.subplots(figsize=(8, 6))
-    for house in houses:
-        house_data = data[data["Hogwarts House"] == house][course].dropna()
-        ax.hist(
-            house_data,
-            alpha=0.6,
-            bins=20,
-            label=house,
-            color=house_colors.get(house, 'pink'))
+    draw_histogram(ax, histograms, course)
 
     ax.set_title("the most homogenous course : " + course)
     ax.set_xlabel("Score")
     ax.set_ylabel("Count")
     ax.grid(True)
-    ax.legend()
+    if histograms["houses"]:
+        ax.legend()
     plt.tight_layout()
+    os.makedirs("img", exist_ok=True)
     plt.savefig("img/homogenous_course.png")
     plt.show()
 
@@ -205,16 +437,16 @@ def main():
             print("Usage: python histogram.py dataset_train.csv")
             return
         data = load(sys.argv[1])
-        res = {}
         if data is not None:
-            for col in data.iloc[:, 6:].columns:
-                res[col] = find_homogenous_course(data.dropna(subset=[col]), col)
-            plot_histograms(data)
-            min_val = Min(res.values())
-            homogenous_course = [k for k, v in res.items() if v == min_val]
+            ranking = levene_all(data, data.iloc[:, 6:].columns)
+            histograms = load_histograms(sys.argv[1])
+            plot_histograms(histograms)
+            print(ranking)
+            homogenous_course = ranking.index[0]
             print(f"with the test of Levene, we can determinated the most homogenous course:")
-            print(f"{homogenous_course[0]} with : {min_val}")
-            plot_histograms_homogenous(homogenous_course[0], data)
+            print(f"{homogenous_course} with : {ranking['W'].iloc[0]} "
+                  f"(p-value: {ranking['p-value'].iloc[0]:.4f})")
+            plot_histograms_homogenous(homogenous_course, histograms)
     except Exception as e:
         print(f"Error: {e}") 
 
@@ -0,0 +1,127 @@
+"""
+Lightweight inference runtime: everything needed to score students with a
+trained model. It depends on NumPy only, so that scoring a few rows does not
+pay for the pandas and matplotlib imports of the training and plotting scripts.
+
+Usage:
+    from inference import load_model, predict
+    model = load_model()
+    houses = predict(rows, model)
+"""
+
+
+import numpy as np
+from model import load_model, MODEL_FILE  # re-exported for callers
+
+
+__all__ = ["MODEL_FILE", "load_model", "normalize_w_param", "predict", "predict_classes",
+           "sigmoid", "softmax"]
+
+
+def sigmoid(z):
+    """
+    Numerically stable sigmoid activation function.
+
+    Works element-wise on arrays: exp() is only ever evaluated on -|z|,
+    so large positive or negative inputs never overflow. float32 inputs
+    stay float32, anything else is computed in float64.
+
+    Args:
+        z (float or np.ndarray): Input value(s).
+
+    Returns:
+        float or np.ndarray: Output between 0 and 1, same shape as z.
+    """
+    z = np.asarray(z)
+    if z.dtype not in (np.float32, np.float64):
+        z = z.astype(np.float64)
+    e = np.exp(-np.abs(z))
+    out = np.where(z >= 0, 1 / (1 + e), e / (1 + e))
+    return out if out.ndim else float(out)
+
+
+def softmax(Z, axis=-1):
+    """
+    Softmax along an axis, shifted by the maximum to prevent overflow.
+
+    Args:
+        Z (np.ndarray): Scores.
+        axis (int): Axis holding the classes (default: last).
+
+    Returns:
+        np.ndarray: Probabilities, same shape as Z, summing to 1 along axis.
+    """
+    E = np.exp(Z - Z.max(axis=axis, keepdims=True))
+    return E / E.sum(axis=axis, keepdims=True)
+
+
+def normalize_w_param(X, model):
+    """
+    Normalize input features using the means and standard deviations
+    stored in the model, in the dtype of the model.
+
+    Parameters:
+        X (np.ndarray): The feature matrix to normalize.
+        model (dict): The model returned by load_model().
+
+    Returns:
+        np.ndarray: The normalized feature matrix.
+    """
+    dtype = model["std"].dtype
+    std = np.where(model["std"] != 0, model["std"], 1).astype(dtype, copy=False)
+    normalized = (np.asarray(X, dtype=dtype) - model["mean"]) / std
+    return np.where(model["std"] != 0, normalized, dtype.type(0))
+
+
+def predict_classes(X, weights, bias, classes, return_proba=False, mode="ova"):
+    """
+    Predict the class of every row of a matrix at once.
+
+    All the rows are scored against all the classes with a single matrix
+    product. Since sigmoid and softmax are monotonic, the class with the
+    highest probability is the one with the highest score, so the argmax is
+    taken on the scores and the probabilities are only computed when asked for.
+
+    Args:
+        X (np.ndarray): Normalized input features (N x D).
+        weights (np.ndarray): Weight matrix (K x D).
+        bias (np.ndarray): Biases (K).
+        classes (list of str): Class of each row of weights.
+        return_proba (bool): Also return the probability matrix.
+        mode (str): "ova" for one-vs-all models, whose probabilities are the
+            sigmoid of each score, or "softmax" for a multinomial model, whose
+            probabilities are the softmax of the scores of a row.
+
+    Returns:
+        np.ndarray: Predicted class of each row (N),
+            and, if return_proba, the probabilities (N x K)
+    """
+    weights = np.asarray(weights)
+    scores = np.asarray(X, dtype=weights.dtype) @ weights.T + bias
+    labels = np.asarray(classes)[np.argmax(scores, axis=1)]
+    if return_proba:
+        return labels, softmax(scores, axis=1) if mode == "softmax" else sigmoid(scores)
+    return labels
+
+
+def predict(X, model, return_proba=False):
+    """
+    Predict the house of raw (not normalized) rows of scores.
+
+    Scores are computed in the dtype the model was saved with (float32 or float64),
+    and turned into probabilities with the link function of its mode.
+
+    Args:
+        X (array-like): Scores (N x D) in the model feature order, NaN for
+            missing scores, which count as 0.0 like at training time.
+        model (dict): The model returned by load_model().
+        return_proba (bool): Also return the probability matrix.
+
+    Returns:
+        np.ndarray: Predicted house of each row,
+            and, if return_proba, the probabilities (N x K)
+    """
+    X = np.nan_to_num(np.asarray(X, dtype=model["weights"].dtype), nan=0.0)
+    return predict_classes(normalize_w_param(X, model), model["weights"], model["bias"],
+                           model["classes"], return_proba=return_proba,
+                           mode=model.get("mode", "ova"))
@@ -1,95 +1,89 @@
-from logreg_train import predict_class
-import pandas as pd
-from utils import load
+import argparse
+import os
+from inference import load_model, predict
+from utils import read_dataset, read_header, iter_chunks
 import sys
 
-def load_normalization_params(filename="normalization_params.txt"):
+
+def predict_frame(data, model):
     """
-    Load the normalization parameters (mean and standard deviation) from a file.
+    Predict the house of every student of a DataFrame.
 
     Parameters:
-        filename (str): Path to the file containing normalization parameters.
+        data (pd.DataFrame): Students, with a column for each feature of the model.
+        model (dict): The model returned by load_model().
 
     Returns:
-        tuple: A tuple containing two lists:
-            - means (list of float): The mean values for each feature.
-            - stds (list of float): The standard deviation values for each feature.
-    """
-    with open(filename, "r") as file:
-        lines = file.readlines()
-        means = []
-        stds = []
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith("mean="):
-                means = list(map(float, line.strip().split("=")[1].split(",")))
-            elif line.startswith("std="):
-                stds = list(map(float, line.strip().split("=")[1].split(",")))
-        return means, stds
-
-
-def normalize_w_param(X):
+        np.ndarray: The predicted house of each row.
+
+    Raises:
+        ValueError: If a feature of the model is missing.
     """
-    Normalize input features using precomputed means and standard deviations.
+    missing = [f for f in model["features"] if f not in data.columns]
+    if missing:
+        raise ValueError(f"feature schema mismatch (missing: {missing})")
+    return predict(data[model["features"]].to_numpy(dtype=model["weights"].dtype), model)
 
-    Parameters:
-        X (list of list of float): The feature matrix to normalize.
+
+def parse_args():
+    """
+    Parse the command-line arguments of the prediction script.
 
     Returns:
-        list of list of float: The normalized feature matrix.
+        argparse.Namespace: The parsed arguments.
     """
-    cols = list(zip(*X))  # transpose
-    normalized = []
-    means, stds = load_normalization_params()
-    for col, mean, std in zip(cols, means, stds):
-        normalized.append([(x - mean) / std if std != 0 else 0.0 for x in col])
-    return list(map(list, zip(*normalized)))  # re-transpose
+    parser = argparse.ArgumentParser(
+        description="Predict the Hogwarts house of students with a trained model.")
+    parser.add_argument("dataset", help="path to the csv file to score")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream the csv in chunks of this many rows, "
+                             "writing predictions as they are made")
+    return parser.parse_args()
 
 
 def main():
     """
-    Main function that loads test data, applies normalization, performs prediction
-    using pre-trained classifiers, writes the results to a CSV file, and prints accuracy.
+    Main function that loads test data and the model, applies normalization, performs
+    prediction using pre-trained classifiers and writes the results to a CSV file.
+
+    With --chunksize, the input is read, scored and written chunk by chunk, so
+    memory stays flat whatever the size of the input.
 
     Command-line Arguments:
-        sys.argv[1] (str): Path to the test dataset CSV file.
+        dataset (str): Path to the test dataset CSV file.
 
     Output:
         - Writes predictions to 'houses.csv'.
     """
     try:
-        assert len(sys.argv) == 2,\
-            "Usage: python histogram.py dataset_test.csv"
-        data_test = load(sys.argv[1])
-
-        classifiers = {}
-
-        with open("classifiers.txt", "r") as classifiers_file:
-            lines = classifiers_file.read().split("\n")
-            for line in lines:
-                if line == "":
-                    break
-                class_name, str_values = line.split(":")
-                list_values = str_values.split(",")
-                list_values[-1], intercept = list_values[-1].split(";")
-                classifiers[class_name] = ([float(i) for i in list_values],
-                                            float(intercept))
-
-        X_df = data_test.iloc[:, 6:]
-        X = X_df.values.tolist()  # list of lists
-        X = [[0.0 if pd.isna(xij) else xij for xij in xi] for xi in X]
-        
-        X = normalize_w_param(X)
-
-        y_pred = [predict_class(xi, classifiers) for xi in X]
+        args = parse_args()
+        # the features of the csv (after the 6 identity columns) must be the
+        # ones the model was trained on, in the same order
+        model = load_model(features=read_header(args.dataset)[6:])
+        if args.chunksize:
+            chunks = iter_chunks(args.dataset, args.chunksize)
+        else:
+            # only the feature columns of the model are read, in its dtype
+            chunks = [read_dataset(args.dataset, columns=model["features"],
+                                   float32=model["weights"].dtype == "float32")]
+
+        # write next to the output and rename at the end, so that a failure
+        # never leaves a truncated houses.csv behind
         filename = "houses.csv"
-        with open(filename, "w") as f:
-            f.write("Index,Hogwarts House\n")
-            for i in range(len(y_pred)):
-                f.write(f"{i},{y_pred[i]}\n")
-    
+        partial = filename + ".part"
+        index = 0
+        try:
+            with open(partial, "w") as f:
+                f.write("Index,Hogwarts House\n")
+                for chunk in chunks:
+                    y_pred = predict_frame(chunk, model)
+                    f.writelines(f"{i},{house}\n" for i, house in enumerate(y_pred, index))
+                    index += len(y_pred)
+            os.replace(partial, filename)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
     except Exception as e:
         print(f"Error: {e}")
     except KeyboardInterrupt:
@@ -1,28 +1,14 @@
-import pandas as pd
-import math
+import argparse
+import numpy as np
 import sys
-import matplotlib.pyplot as plt
-from describe import Max, Min, Mean
-from utils import load
-
-def save_normalization_params(means, stds, filename="normalization_params.txt"):
-    """
-    Save the normalization parameters (means and standard deviations) to a file.
-
-    Parameters:
-        means (list of float): The mean values for each feature.
-        stds (list of float): The standard deviation values for each feature.
-        filename (str): The name of the file to save the parameters in (default: "normalization_params.txt").
-
-    Output Format:
-        The file will contain two lines in the following format:
-            mean=value1,value2,...
-            std=value1,value2,...
-    """
-    with open(filename, "w") as file:
-        means_str = ",".join(map(str, means))
-        stds_str = ",".join(map(str, stds))
-        file.write(f"mean={means_str}\nstd={stds_str}\n")
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from describe import Max, Mean, moments, merge_moments
+from inference import sigmoid, softmax, predict, predict_classes
+from model import save_model
+from telemetry import collect, TrainingRecorder
+from utils import load, iter_chunks
 
 
 def normalize(X):
@@ -33,7 +19,8 @@ def normalize(X):
         X (list of list of float): Dataset to normalize.
 
     Returns:
-        list of list of float: Normalized dataset.
+        tuple: normalized dataset (list of list of float),
+            means (list of float), stds (list of float)
     """
     cols = list(zip(*X))  # transpose
     normalized = []
@@ -45,22 +32,46 @@ def normalize(X):
         normalized.append([(x - mean) / std for x in col])
         means.append(mean)
         stds.append(std)
-    save_normalization_params(means, stds)
-    return list(map(list, zip(*normalized)))  # re-transpose
+    return list(map(list, zip(*normalized))), means, stds  # re-transpose
+
+
+def normalize_array(X, dtype="float64"):
+    """
+    Normalize a feature matrix with standard scores, like normalize(), at once.
 
+    The means and standard deviations are accumulated in float64 whatever
+    the dtype, so a float32 matrix only loses precision when it is stored.
+    A constant feature is mapped to 0. The result is C-contiguous whatever
+    the layout of X (DataFrame.to_numpy() gives column-major arrays), since
+    the results of the matrix products depend on the memory layout.
 
-def sigmoid(z):
+    Args:
+        X (np.ndarray): Dataset to normalize (m x n), without NaN.
+        dtype (str): Type of the normalized matrix, "float64" or "float32".
+
+    Returns:
+        tuple: normalized dataset (C-contiguous np.ndarray of dtype),
+            means (list of float), stds (list of float)
+    """
+    means = X.mean(axis=0, dtype=np.float64)
+    stds = np.sqrt(np.mean((X - means) ** 2, axis=0, dtype=np.float64))
+    normalized = (X - means) / np.where(stds != 0, stds, 1.0)
+    return np.ascontiguousarray(normalized, dtype=dtype), means.tolist(), stds.tolist()
+
+
+def as_float_array(X):
     """
-    Sigmoid activation function.
+    Convert features to an array, keeping float32 data in float32 and
+    converting anything else to float64.
 
     Args:
-        z (float): Input value.
+        X (list of list of float or np.ndarray): Input features.
 
     Returns:
-        float: Output between 0 and 1.
+        np.ndarray: The features as a float32 or float64 array.
     """
-    z = Max([Min([z, 100]), -100])  # clamp to prevent overflow
-    return 1 / (1 + math.exp(-z))
+    X = np.asarray(X)
+    return X if X.dtype in (np.float32, np.float64) else X.astype(np.float64)
 
 
 def predict_proba(x, w, b):
@@ -79,30 +90,557 @@ def predict_proba(x, w, b):
     return sigmoid(z)
 
 
-def train_logistic_regression(X, y, epochs=1000, lr=0.1):
+SCHEDULES = {
+    "constant": lambda lr, epoch, decay, step_size: lr,
+    "step": lambda lr, epoch, decay, step_size: lr * decay ** (epoch // step_size),
+    "exponential": lambda lr, epoch, decay, step_size: lr * np.exp(-decay * epoch),
+    "inverse-time": lambda lr, epoch, decay, step_size: lr / (1 + decay * epoch),
+}
+
+
+def learning_rate(lr, epoch, schedule="constant", decay=0.5, step_size=100):
+    """
+    Compute the learning rate to use for an epoch.
+
+    Args:
+        lr (float): Initial learning rate.
+        epoch (int): Current epoch, starting at 0.
+        schedule (str): One of "constant", "step", "exponential", "inverse-time".
+        decay (float): Multiplicative drop for "step", decay rate otherwise.
+        step_size (int): Number of epochs between two drops for "step".
+
+    Returns:
+        float: The learning rate of this epoch.
+    """
+    return SCHEDULES[schedule](lr, epoch, decay, step_size)
+
+
+def batches(m, batch_size=None, shuffle=False, rng=None):
+    """
+    Yield the sample indices of each mini-batch of an epoch.
+
+    Args:
+        m (int): Number of samples.
+        batch_size (int or None): Samples per batch, None for full batch.
+        shuffle (bool): Draw a new random order of the samples.
+        rng (np.random.Generator): Random generator used to shuffle.
+
+    Yields:
+        slice or np.ndarray: Indices of the samples of a batch.
+    """
+    if not batch_size or batch_size >= m:
+        yield slice(None)
+        return
+    order = rng.permutation(m) if shuffle else np.arange(m)
+    for start in range(0, m, batch_size):
+        yield order[start:start + batch_size]
+
+
+def converged(prev_loss, loss, grad_norm, tol=None, grad_tol=None):
+    """
+    Tell whether training can stop early.
+
+    Args:
+        prev_loss (float or None): Loss of the previous epoch.
+        loss (float): Loss of the current epoch.
+        grad_norm (float): Norm of the full gradient of the current epoch.
+        tol (float or None): Stop when the loss moves by less than tol.
+        grad_tol (float or None): Stop when the gradient norm is below grad_tol.
+
+    Returns:
+        bool: True when one of the tolerances is reached.
+    """
+    if tol is not None and prev_loss is not None and abs(prev_loss - loss) < tol:
+        return True
+    return grad_tol is not None and grad_norm < grad_tol
+
+
+def logistic_loss_and_grad(X, y, w, b):
+    """
+    Compute the mean cross-entropy loss and its gradient for a binary model.
+
+    Args:
+        X (np.ndarray): Input features (m x n).
+        y (np.ndarray): Binary labels.
+        w (np.ndarray): Weights.
+        b (float): Bias.
+
+    Returns:
+        tuple: loss (float), weight gradient (np.ndarray), bias gradient (float)
+    """
+    z = X @ w + b
+    error = sigmoid(z) - y
+    # log(1 + e^z) - y.z, written with logaddexp to stay finite for large |z|
+    loss = float(np.mean(np.logaddexp(0, z) - y * z))
+    return loss, (X.T @ error) / len(y), float(error.mean())
+
+
+def train_logistic_regression(X, y, epochs=1000, lr=0.1, batch_size=None,
+                              shuffle=False, schedule="constant", decay=0.5,
+                              step_size=100, tol=None, grad_tol=None, seed=None,
+                              return_info=False, callback=None):
     """
     Train a binary logistic regression model using gradient descent.
 
+    The gradient of a batch is computed at once with matrix products:
+        dw = X.T @ (sigmoid(X @ w + b) - y) / m
+    By default every epoch is a single full-batch step at a fixed learning rate.
+    A float32 X is trained in float32 from end to end.
+
     Args:
-        X (list of list of float): Input features.
-        y (list of int): Binary labels.
-        epochs (int): Number of iterations.
-        lr (float): Learning rate.
+        X (list of list of float or np.ndarray): Input features (m x n).
+        y (list of int or np.ndarray): Binary labels.
+        epochs (int): Maximum number of iterations over the dataset.
+        lr (float): Initial learning rate.
+        batch_size (int or None): Mini-batch size, None for full batch.
+        shuffle (bool): Shuffle the samples at each epoch.
+        schedule (str): Learning rate schedule, see learning_rate().
+        decay (float): Schedule parameter, see learning_rate().
+        step_size (int): Epochs between two drops of the "step" schedule.
+        tol (float or None): Stop early when the loss moves by less than tol.
+        grad_tol (float or None): Stop early when the gradient norm is below grad_tol.
+        seed (int or None): Seed of the shuffling.
+        return_info (bool): Also return the number of epochs used and final loss.
+        callback (callable or None): Called after each epoch with a dict
+            {"epoch", "loss", "grad_norm", "lr", "samples", "seconds"}, see
+            telemetry.py. With full batches the loss and gradient norm are
+            those of the step, taken at the weights before the update.
 
     Returns:
         tuple: weights (list), bias (float)
+            and, if return_info, a dict {"iterations": int, "evaluations": int, "loss": float}
+            where iterations is the number of epochs and evaluations the
+            number of passes over the whole dataset
     """
-    w = [0.0] * len(X[0])
-    b = 0.0
+    X = as_float_array(X)
+    y = np.asarray(y, dtype=X.dtype)
+    m = X.shape[0]
+    w = np.zeros(X.shape[1], dtype=X.dtype)
+    b = X.dtype.type(0)
+    rng = np.random.default_rng(seed)
+    full_batch = not batch_size or batch_size >= m
+    early_stop = tol is not None or grad_tol is not None
+    prev_loss = None
+    evaluations = 0
 
     for epoch in range(epochs):
-        for xi, yi in zip(X, y):
-            pred = predict_proba(xi, w, b)
-            error = pred - yi
-            for j in range(len(w)):
-                w[j] -= lr * error * xi[j]
-            b -= lr * error
-    return w, b
+        if callback is not None:
+            started = time.perf_counter()
+        rate = learning_rate(lr, epoch, schedule, decay, step_size)
+        evaluations += 1
+        for idx in batches(m, batch_size, shuffle, rng):
+            Xb, yb = X[idx], y[idx]
+            z = Xb @ w + b
+            error = sigmoid(z) - yb
+            grad_w = (Xb.T @ error) / len(error)
+            grad_b = error.sum() / len(error)
+            w -= rate * grad_w
+            b -= rate * grad_b
+        if early_stop or callback is not None:
+            if callback is not None:
+                seconds = time.perf_counter() - started
+            if full_batch:
+                # the step above already saw the whole dataset: reuse its
+                # loss and gradient, taken at the pre-update weights
+                loss = float(np.mean(np.logaddexp(0, z) - yb * z))
+            else:
+                loss, grad_w, grad_b = logistic_loss_and_grad(X, y, w, b)
+                evaluations += 1
+            grad_norm = float(np.sqrt(grad_w @ grad_w + grad_b ** 2))
+            if callback is not None:
+                callback({"epoch": epoch, "loss": loss, "grad_norm": grad_norm,
+                          "lr": float(rate), "samples": m, "seconds": seconds})
+            if converged(prev_loss, loss, grad_norm, tol, grad_tol):
+                break
+            prev_loss = loss
+
+    if not return_info:
+        return w.tolist(), float(b)
+    loss = logistic_loss_and_grad(X, y, w, b)[0]
+    info = {"iterations": epoch + 1, "evaluations": evaluations, "loss": loss}
+    return w.tolist(), float(b), info
+
+
+def _augment(X):
+    """
+    Append a column of ones to X so that the bias is the last parameter.
+
+    Args:
+        X (np.ndarray): Input features (m x n).
+
+    Returns:
+        np.ndarray: Augmented features (m x n+1).
+    """
+    return np.hstack([X, np.ones((X.shape[0], 1))])
+
+
+def _loss_and_grad(Xa, y, theta):
+    """
+    Compute the mean cross-entropy loss, its gradient and the predicted
+    probabilities for parameters theta = [w, b].
+
+    Args:
+        Xa (np.ndarray): Augmented input features (m x n+1).
+        y (np.ndarray): Binary labels.
+        theta (np.ndarray): Weights followed by the bias.
+
+    Returns:
+        tuple: loss (float), gradient (np.ndarray), probabilities (np.ndarray)
+    """
+    z = Xa @ theta
+    p = sigmoid(z)
+    loss = float(np.mean(np.logaddexp(0, z) - y * z))
+    return loss, Xa.T @ (p - y) / len(y), p
+
+
+def _line_search(Xa, y, theta, loss, grad, direction, max_halvings=30):
+    """
+    Backtracking line search: halve the step until the Armijo condition holds.
+
+    Args:
+        Xa (np.ndarray): Augmented input features.
+        y (np.ndarray): Binary labels.
+        theta (np.ndarray): Current parameters.
+        loss (float): Loss at theta.
+        grad (np.ndarray): Gradient at theta.
+        direction (np.ndarray): Descent direction.
+        max_halvings (int): Maximum number of step halvings.
+
+    Returns:
+        tuple: new theta, its loss, gradient, probabilities,
+            the number of loss evaluations made and the step length
+    """
+    slope = grad @ direction
+    t = 1.0
+    for evaluations in range(1, max_halvings + 1):
+        candidate = theta + t * direction
+        new_loss, new_grad, p = _loss_and_grad(Xa, y, candidate)
+        if new_loss <= loss + 1e-4 * t * slope:
+            break
+        t /= 2
+    return candidate, new_loss, new_grad, p, evaluations, t
+
+
+def train_newton(X, y, max_iter=100, tol=None, grad_tol=1e-6, return_info=False,
+                 callback=None):
+    """
+    Train a binary logistic regression model with Newton's method (IRLS).
+
+    Each iteration solves H.d = -g with the exact Hessian
+        H = Xa.T @ diag(p (1 - p)) @ Xa / m
+    and takes a damped step along d.
+
+    Args:
+        X (list of list of float or np.ndarray): Input features (m x n).
+        y (list of int or np.ndarray): Binary labels.
+        max_iter (int): Maximum number of Newton iterations.
+        tol (float or None): Stop when the loss moves by less than tol.
+        grad_tol (float or None): Stop when the gradient norm is below grad_tol.
+        return_info (bool): Also return iteration counts and final loss.
+        callback (callable or None): Called after each iteration, like in
+            train_logistic_regression(); "lr" is the step length of the line
+            search and "samples" counts every loss evaluation.
+
+    Returns:
+        tuple: weights (list), bias (float)
+            and, if return_info, a dict {"iterations": int, "evaluations": int, "loss": float}
+    """
+    Xa = _augment(np.asarray(X, dtype=float))
+    y = np.asarray(y, dtype=float)
+    theta = np.zeros(Xa.shape[1])
+    # tiny ridge keeping H invertible when a class is (almost) separable
+    ridge = 1e-10 * np.eye(len(theta))
+    loss, grad, p = _loss_and_grad(Xa, y, theta)
+    evaluations = 1
+    iterations = 0
+    prev_loss = None
+
+    while iterations < max_iter:
+        if converged(prev_loss, loss, np.linalg.norm(grad), tol, grad_tol):
+            break
+        if callback is not None:
+            started = time.perf_counter()
+        H = (Xa.T * (p * (1 - p))) @ Xa / len(y) + ridge
+        direction = -np.linalg.solve(H, grad)
+        prev_loss = loss
+        theta, loss, grad, p, n, step = _line_search(Xa, y, theta, loss, grad, direction)
+        evaluations += n
+        if callback is not None:
+            callback({"epoch": iterations, "loss": loss, "grad_norm": float(np.linalg.norm(grad)),
+                      "lr": step, "samples": n * len(y),
+                      "seconds": time.perf_counter() - started})
+        iterations += 1
+
+    if not return_info:
+        return theta[:-1].tolist(), float(theta[-1])
+    info = {"iterations": iterations, "evaluations": evaluations, "loss": loss}
+    return theta[:-1].tolist(), float(theta[-1]), info
+
+
+def train_lbfgs(X, y, max_iter=100, tol=None, grad_tol=1e-6, memory=10,
+                return_info=False, callback=None):
+    """
+    Train a binary logistic regression model with L-BFGS.
+
+    The inverse Hessian is approximated from the last `memory` parameter and
+    gradient differences (two-loop recursion), followed by a backtracking
+    line search.
+
+    Args:
+        X (list of list of float or np.ndarray): Input features (m x n).
+        y (list of int or np.ndarray): Binary labels.
+        max_iter (int): Maximum number of iterations.
+        tol (float or None): Stop when the loss moves by less than tol.
+        grad_tol (float or None): Stop when the gradient norm is below grad_tol.
+        memory (int): Number of correction pairs kept.
+        return_info (bool): Also return iteration counts and final loss.
+        callback (callable or None): Called after each iteration, see train_newton().
+
+    Returns:
+        tuple: weights (list), bias (float)
+            and, if return_info, a dict {"iterations": int, "evaluations": int, "loss": float}
+    """
+    Xa = _augment(np.asarray(X, dtype=float))
+    y = np.asarray(y, dtype=float)
+    theta = np.zeros(Xa.shape[1])
+    loss, grad, _ = _loss_and_grad(Xa, y, theta)
+    evaluations = 1
+    iterations = 0
+    prev_loss = None
+    pairs = []
+
+    while iterations < max_iter:
+        if converged(prev_loss, loss, np.linalg.norm(grad), tol, grad_tol):
+            break
+        if callback is not None:
+            started = time.perf_counter()
+        # two-loop recursion: direction = -H.grad
+        q = grad.copy()
+        alphas = []
+        for s, yk, rho in reversed(pairs):
+            alpha = rho * (s @ q)
+            q -= alpha * yk
+            alphas.append(alpha)
+        if pairs:
+            s, yk, _ = pairs[-1]
+            q *= (s @ yk) / (yk @ yk)
+        else:
+            q /= max(np.linalg.norm(grad), 1.0)
+        for (s, yk, rho), alpha in zip(pairs, reversed(alphas)):
+            q += s * (alpha - rho * (yk @ q))
+
+        prev_loss = loss
+        new_theta, loss, new_grad, _, n, step = _line_search(Xa, y, theta, loss, grad, -q)
+        evaluations += n
+        s, yk = new_theta - theta, new_grad - grad
+        if s @ yk > 1e-12:
+            pairs.append((s, yk, 1.0 / (s @ yk)))
+            pairs = pairs[-memory:]
+        theta, grad = new_theta, new_grad
+        if callback is not None:
+            callback({"epoch": iterations, "loss": loss, "grad_norm": float(np.linalg.norm(grad)),
+                      "lr": step, "samples": n * len(y),
+                      "seconds": time.perf_counter() - started})
+        iterations += 1
+
+    if not return_info:
+        return theta[:-1].tolist(), float(theta[-1])
+    info = {"iterations": iterations, "evaluations": evaluations, "loss": loss}
+    return theta[:-1].tolist(), float(theta[-1]), info
+
+
+SOLVERS = {
+    "gd": train_logistic_regression,
+    "newton": train_newton,
+    "lbfgs": train_lbfgs,
+}
+
+
+def _train_shared_class(shm_name, shape, dtype, y_c, solver, options, record=False):
+    """
+    Worker of the parallel one-vs-all training: attach the shared feature
+    matrix and train the binary classifier of one class.
+
+    Args:
+        shm_name (str): Name of the shared memory block holding X.
+        shape (tuple): Shape of X.
+        dtype (str): Dtype of X.
+        y_c (np.ndarray): Binary labels of the class.
+        solver (str): Name of the solver in SOLVERS.
+        options (dict): Options passed to the solver.
+        record (bool): Collect the telemetry records of the training, returned
+            under "telemetry" in the info dict.
+
+    Returns:
+        tuple: weights (list), bias (float), info (dict)
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        X = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        records = []
+        callback = collect(records) if record else None
+        w, b, info = SOLVERS[solver](X, y_c, return_info=True, callback=callback, **options)
+        del X  # release the buffer before closing the block
+        if record:
+            info["telemetry"] = records
+        return w, b, info
+    finally:
+        shm.close()
+
+
+def train_one_vs_all(X, labels, classes, jobs=1, solver="gd", recorder=None, **options):
+    """
+    Train one binary logistic regression per class (one-vs-all).
+
+    With jobs > 1, each class is trained in a worker process. The feature
+    matrix is copied once into shared memory and every worker reads it from
+    there instead of receiving a pickled copy. Workers run the exact same
+    computation as the serial loop, so the weights are bit-identical.
+
+    Args:
+        X (list of list of float or np.ndarray): Normalized input features.
+        labels (list of str): Class label of each sample.
+        classes (list of str): Sorted list of class names.
+        jobs (int): Number of worker processes, 1 to train serially.
+        solver (str): "gd", "newton" or "lbfgs", see SOLVERS.
+        recorder (telemetry.TrainingRecorder or None): Records the epochs of
+            every class, workers included.
+        **options: Training options passed to the solver.
+
+    Returns:
+        tuple: dict of class to (weights, bias),
+            dict of class to {"iterations": int, "evaluations": int, "loss": float}
+    """
+    labels = np.asarray(labels)
+    targets = {c: (labels == c).astype(np.int8) for c in classes}
+    # both paths train on the same C-ordered matrix: the shared copy is
+    # C-ordered, and BLAS results depend on the layout
+    X = np.ascontiguousarray(as_float_array(X))
+    if jobs > 1:
+        shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+        try:
+            shared = np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)
+            shared[:] = X
+            with ProcessPoolExecutor(max_workers=min(jobs, len(classes))) as pool:
+                futures = {c: pool.submit(_train_shared_class, shm.name, X.shape,
+                                          X.dtype.str, targets[c], solver, options,
+                                          recorder is not None)
+                           for c in classes}
+                results = {c: futures[c].result() for c in classes}
+            del shared
+        finally:
+            shm.close()
+            shm.unlink()
+        if recorder is not None:
+            for c in classes:
+                recorder.extend(c, results[c][2].pop("telemetry"))
+    else:
+        results = {c: SOLVERS[solver](X, targets[c], return_info=True,
+                                      callback=recorder.callback(c) if recorder else None,
+                                      **options)
+                   for c in classes}
+
+    classifiers = {c: (w, b) for c, (w, b, _) in results.items()}
+    history = {c: info for c, (_, _, info) in results.items()}
+    return classifiers, history
+
+
+def softmax_loss(Xt, Yt, W, b):
+    """
+    Compute the mean cross-entropy loss of a softmax model.
+
+    Args:
+        Xt (np.ndarray): Transposed input features (n x m).
+        Yt (np.ndarray): Transposed one-hot labels (K x m).
+        W (np.ndarray): Weight matrix (K x n).
+        b (np.ndarray): Biases (K).
+
+    Returns:
+        float: The loss.
+    """
+    S = W @ Xt + b[:, None]
+    S_max = S.max(axis=0)
+    log_norm = S_max + np.log(np.exp(S - S_max).sum(axis=0))
+    return float(np.mean(log_norm - (S * Yt).sum(axis=0)))
+
+
+def train_softmax_regression(X, labels, classes, epochs=1000, lr=0.1,
+                             batch_size=None, shuffle=False, schedule="constant",
+                             decay=0.5, step_size=100, tol=None, grad_tol=None,
+                             seed=None, recorder=None):
+    """
+    Train a multinomial (softmax) logistic regression model using
+    gradient descent.
+
+    A single K x D weight matrix is learned for all classes, so each epoch
+    makes one pass over the data instead of one pass per class.
+
+    Since sigmoid is monotonic, the class with the highest softmax score is
+    also the class with the highest sigmoid(w.x + b): the returned weights
+    are stacked like one-vs-all ones. They must be saved with mode="softmax"
+    so that predicted probabilities go through softmax, not sigmoid.
+
+    Args:
+        X (list of list of float or np.ndarray): Normalized input features.
+        labels (list of str): Class label of each sample.
+        classes (list of str): Sorted list of class names.
+        epochs, lr, batch_size, shuffle, schedule, decay, step_size, tol,
+        grad_tol, seed: See train_logistic_regression().
+        recorder (telemetry.TrainingRecorder or None): Records the epochs,
+            under the class name "softmax".
+
+    Returns:
+        tuple: dict of class to (weights, bias),
+            dict of class to {"iterations": int, "evaluations": int, "loss": float}
+    """
+    X = as_float_array(X)
+    m = X.shape[0]
+    # classes x samples layout: softmax reduces over short contiguous columns
+    Xt = np.ascontiguousarray(X.T)
+    Yt = (np.asarray(classes)[:, None] == np.asarray(labels)[None, :]).astype(X.dtype)
+    W = np.zeros((len(classes), X.shape[1]), dtype=X.dtype)
+    b = np.zeros(len(classes), dtype=X.dtype)
+    rng = np.random.default_rng(seed)
+    early_stop = tol is not None or grad_tol is not None
+    callback = recorder.callback("softmax") if recorder else None
+    prev_loss = None
+    evaluations = 0
+
+    for epoch in range(epochs):
+        if callback is not None:
+            started = time.perf_counter()
+        rate = learning_rate(lr, epoch, schedule, decay, step_size)
+        evaluations += 1
+        for idx in batches(m, batch_size, shuffle, rng):
+            Xb = X[idx]
+            error = softmax(W @ Xt[:, idx] + b[:, None], axis=0) - Yt[:, idx]
+            W -= rate * (error @ Xb) / len(Xb)
+            b -= rate * error.sum(axis=1) / len(Xb)
+        if early_stop or callback is not None:
+            if callback is not None:
+                seconds = time.perf_counter() - started
+            error = softmax(W @ Xt + b[:, None], axis=0) - Yt
+            grad_norm = float(np.sqrt(np.sum((error @ X / m) ** 2)
+                                      + np.sum((error.sum(axis=1) / m) ** 2)))
+            loss = softmax_loss(Xt, Yt, W, b)
+            evaluations += 1
+            if callback is not None:
+                callback({"epoch": epoch, "loss": loss, "grad_norm": grad_norm,
+                          "lr": float(rate), "samples": m, "seconds": seconds})
+            if converged(prev_loss, loss, grad_norm, tol, grad_tol):
+                break
+            prev_loss = loss
+
+    info = {"iterations": epoch + 1, "evaluations": evaluations,
+            "loss": softmax_loss(Xt, Yt, W, b)}
+    classifiers = {c: (W[k].tolist(), float(b[k])) for k, c in enumerate(classes)}
+    return classifiers, {c: info for c in classes}
+
+
+TRAINERS = {
+    "ova": train_one_vs_all,
+    "softmax": train_softmax_regression,
+}
 
 
 def predict_class(x, classifiers):
@@ -129,18 +667,448 @@ def predict_class(x, classifiers):
             return c
 
 
-def save_classifiers(classifiers, filename="classifiers.txt"):
+def stack_classifiers(classifiers):
     """
-    Save trained classifiers to a text file.
+    Stack one weight vector and bias per class into arrays.
 
     Args:
         classifiers (dict): Dictionary of class to (weights, bias).
-        filename (str): Output file name.
+
+    Returns:
+        tuple: weights (np.ndarray, K x D), biases (np.ndarray, K), classes (list of str)
+    """
+    classes = list(classifiers)
+    W = np.array([classifiers[c][0] for c in classes], dtype=float)
+    b = np.array([classifiers[c][1] for c in classes], dtype=float)
+    return W, b, classes
+
+
+def stream_normalization_params(path, chunksize):
+    """
+    First streaming pass over a csv file: compute the means and standard
+    deviations of the features with a chunked Welford update, and collect
+    the class names. Only one chunk is held in memory at a time.
+
+    Args:
+        path (str): Path to the training csv file.
+        chunksize (int): Number of rows read at a time.
+
+    Returns:
+        tuple: means (list of float), stds (list of float),
+            sorted classes (list of str), feature names (list of str)
     """
-    with open(filename, "w") as f:
-        for class_name, (weights, bias) in classifiers.items():
-            weights_str = ",".join(f"{w}" for w in weights)
-            f.write(f"{class_name}:{weights_str};{bias}\n")
+    state = None
+    classes = set()
+    for chunk in iter_chunks(path, chunksize):
+        features = list(chunk.columns[6:])
+        # same NaN handling as normalize(): missing scores count as 0.0
+        X = np.nan_to_num(chunk.iloc[:, 6:].to_numpy(dtype=float), nan=0.0)
+        state = merge_moments(state, moments(X))
+        classes.update(chunk["Hogwarts House"].dropna())
+    count, mean, M2 = state
+    return mean.tolist(), np.sqrt(M2 / count).tolist(), sorted(classes), features
+
+
+def normalized_chunks(path, chunksize, means, stds, dtype="float64"):
+    """
+    Read a csv file chunk by chunk and normalize the features of each chunk.
+    A constant feature is mapped to 0, like in normalize_array().
+
+    Args:
+        path (str): Path to the csv file.
+        chunksize (int): Number of rows read at a time.
+        means (np.ndarray): Mean of each feature.
+        stds (np.ndarray): Standard deviation of each feature.
+        dtype (str): Type of the normalized features.
+
+    Yields:
+        tuple: normalized features (np.ndarray), labels (np.ndarray)
+    """
+    constant = stds == 0
+    scale = np.where(constant, 1.0, stds)
+    for chunk in iter_chunks(path, chunksize):
+        X = np.nan_to_num(chunk.iloc[:, 6:].to_numpy(dtype=float), nan=0.0)
+        normalized = np.where(constant, 0.0, (X - means) / scale)
+        yield normalized.astype(dtype, copy=False), chunk["Hogwarts House"].to_numpy()
+
+
+def train_streaming(path, classes, means, stds, chunksize=10000, epochs=1000,
+                    lr=0.1, schedule="constant", decay=0.5, step_size=100, tol=None,
+                    dtype="float64", recorder=None):
+    """
+    Train one-vs-all classifiers epoch by epoch over the chunks of a csv file.
+
+    The binary classifiers of all classes are updated together, with one
+    gradient step per chunk, so an epoch reads the file once and the memory
+    used depends on chunksize only. A class stops being updated once its
+    loss over an epoch moves by less than tol.
+
+    Args:
+        path (str): Path to the training csv file.
+        classes (list of str): Sorted list of class names.
+        means (list of float): Mean of each feature.
+        stds (list of float): Standard deviation of each feature.
+        chunksize (int): Number of rows per chunk, i.e. per gradient step.
+        epochs (int): Maximum number of passes over the file.
+        lr, schedule, decay, step_size: See learning_rate().
+        tol (float or None): Stop a class when its epoch loss moves by less than tol.
+        dtype (str): Type of the features and weights, "float64" or "float32".
+        recorder (telemetry.TrainingRecorder or None): Records the epochs of
+            every active class. The loss and gradient norm of an epoch are
+            averaged over its chunks, and the time is that of the whole epoch,
+            shared by the classes trained together.
+
+    Returns:
+        tuple: dict of class to (weights, bias),
+            dict of class to {"iterations": int, "evaluations": int, "loss": float}
+            where loss is the mean loss seen over the last epoch
+    """
+    means, stds = np.asarray(means), np.asarray(stds)
+    class_names = np.asarray(classes)
+    W = np.zeros((len(classes), len(means)), dtype=dtype)
+    b = np.zeros(len(classes), dtype=dtype)
+    active = np.ones(len(classes), dtype=bool)
+    used = np.zeros(len(classes), dtype=int)
+    callbacks = [recorder.callback(c) for c in classes] if recorder else None
+    prev_loss = None
+
+    for epoch in range(epochs):
+        if callbacks is not None:
+            started = time.perf_counter()
+            total_grad = np.zeros((len(classes), len(means) + 1))
+        rate = learning_rate(lr, epoch, schedule, decay, step_size)
+        total_loss = np.zeros(len(classes))
+        seen = 0
+        for X, labels in normalized_chunks(path, chunksize, means, stds, dtype):
+            Z = X @ W.T + b
+            Y = labels[:, None] == class_names[None, :]
+            error = sigmoid(Z) - Y
+            total_loss += np.sum(np.logaddexp(0, Z) - Y * Z, axis=0)
+            seen += len(X)
+            grad_w, grad_b = error.T @ X, error.sum(axis=0)
+            if callbacks is not None:
+                total_grad[:, :-1] += grad_w
+                total_grad[:, -1] += grad_b
+            W[active] -= rate * grad_w[active] / len(X)
+            b[active] -= rate * grad_b[active] / len(X)
+        loss = total_loss / seen
+        if callbacks is not None:
+            seconds = time.perf_counter() - started
+            grad_norms = np.linalg.norm(total_grad / seen, axis=1)
+            for k in np.flatnonzero(active):
+                callbacks[k]({"epoch": epoch, "loss": float(loss[k]),
+                              "grad_norm": float(grad_norms[k]), "lr": float(rate),
+                              "samples": seen, "seconds": seconds})
+        used[active] += 1
+        if tol is not None and prev_loss is not None:
+            active &= np.abs(prev_loss - loss) >= tol
+            if not active.any():
+                break
+        prev_loss = loss
+
+    classifiers = {c: (W[k].tolist(), float(b[k])) for k, c in enumerate(classes)}
+    history = {c: {"iterations": int(used[k]), "evaluations": epoch + 1,
+                   "loss": float(loss[k])}
+               for k, c in enumerate(classes)}
+    return classifiers, history
+
+
+def stream_breakdown(path, chunksize, means, stds, classifiers):
+    """
+    Streaming pass counting the correct and incorrect predictions per class.
+
+    Args:
+        path (str): Path to the csv file.
+        chunksize (int): Number of rows read at a time.
+        means (list of float): Mean of each feature.
+        stds (list of float): Standard deviation of each feature.
+        classifiers (dict): Dictionary of class to (weights, bias).
+
+    Returns:
+        tuple: accuracy (float), counts (dict of class to [correct, incorrect])
+    """
+    W, b, classes = stack_classifiers(classifiers)
+    counts = {c: [0, 0] for c in classes}
+    for X, labels in normalized_chunks(path, chunksize, np.asarray(means), np.asarray(stds)):
+        y_pred = predict_classes(X, W, b, classes)
+        for c, (correct, incorrect) in count_breakdown(labels, y_pred, classes).items():
+            counts[c][0] += correct
+            counts[c][1] += incorrect
+    total = sum(correct + incorrect for correct, incorrect in counts.values())
+    return sum(correct for correct, _ in counts.values()) / total, counts
+
+
+def count_breakdown(labels, y_pred, classes):
+    """
+    Count the correct predictions of each true class and the incorrect
+    predictions of each predicted class.
+
+    Args:
+        labels (list of str): True labels.
+        y_pred (list of str): Predicted labels.
+        classes (list of str): Sorted list of class names.
+
+    Returns:
+        dict: Dictionary of class to [correct, incorrect].
+    """
+    counts = {c: [0, 0] for c in classes}
+    for true, pred in zip(labels, y_pred):
+        if true == pred:
+            counts[true][0] += 1
+        else:
+            counts[pred][1] += 1
+    return counts
+
+
+def plot_breakdown(counts):
+    """
+    Plot the number of correct and incorrect predictions for each class.
+
+    Args:
+        counts (dict): Dictionary of class to [correct, incorrect],
+            see count_breakdown().
+    """
+    import matplotlib.pyplot as plt  # only loaded when a plot is drawn
+
+    labels_x = list(counts.keys())
+    corrects = [v[0] for v in counts.values()]
+    errors = [v[1] for v in counts.values()]
+
+    bar_width = 0.35
+    x = range(len(labels_x))
+
+    plt.bar(x, corrects, width=bar_width, label="Correct", color='green')
+    plt.bar([i + bar_width for i in x], errors, width=bar_width, label="Incorrect", color='red')
+    plt.xticks([i + bar_width / 2 for i in x], labels_x)
+    plt.title("Prediction Breakdown by Class")
+    plt.legend()
+    plt.show()
+
+
+def parse_args():
+    """
+    Parse the command-line arguments of the training script.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Train a logistic regression model on the Hogwarts dataset.")
+    parser.add_argument("dataset", help="path to the training csv file")
+    parser.add_argument("--mode", choices=sorted(TRAINERS), default="ova",
+                        help="one-vs-all binary models or a single softmax model (default: ova)")
+    parser.add_argument("--solver", choices=list(SOLVERS), default="gd",
+                        help="optimizer of the one-vs-all classifiers (default: gd)")
+    parser.add_argument("--compare", action="store_true",
+                        help="train with every mode and solver and report wall time, "
+                             "accuracy and iterations side by side")
+    parser.add_argument("--epochs", type=int, default=1000,
+                        help="maximum number of epochs (default: 1000)")
+    parser.add_argument("--max-iter", type=int, default=100,
+                        help="maximum number of newton/lbfgs iterations (default: 100)")
+    parser.add_argument("--lr", type=float, default=0.1,
+                        help="initial learning rate (default: 0.1)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="mini-batch size (default: full batch)")
+    parser.add_argument("--shuffle", action="store_true",
+                        help="shuffle the samples at each epoch")
+    parser.add_argument("--schedule", choices=list(SCHEDULES), default="constant",
+                        help="learning rate schedule (default: constant)")
+    parser.add_argument("--decay", type=float, default=0.5,
+                        help="drop factor of the step schedule, decay rate of the others (default: 0.5)")
+    parser.add_argument("--step-size", type=int, default=100,
+                        help="epochs between two drops of the step schedule (default: 100)")
+    parser.add_argument("--tol", type=float, default=None,
+                        help="stop when the loss moves by less than tol between epochs")
+    parser.add_argument("--grad-tol", type=float, default=None,
+                        help="stop when the gradient norm falls below grad-tol "
+                             "(default: none for gd, 1e-6 for newton/lbfgs)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="seed of the shuffling (default: 42)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream the csv in chunks of this many rows instead of "
+                             "loading it (one-vs-all gradient descent only)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="worker processes for one-vs-all training (default: 1)")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="type of the features, the training and the saved model "
+                             "(default: float64)")
+    parser.add_argument("--parity", action="store_true",
+                        help="before training, compare float32 with float64 on a holdout: "
+                             "accuracy and agreement of the predictions")
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="fraction of the rows held out by --parity (default: 0.2)")
+    parser.add_argument("--telemetry", default=None, metavar="PATH",
+                        help="record the loss, gradient norm, learning rate, throughput and "
+                             "time of every epoch of every class, as JSON lines")
+    parser.add_argument("--trace", default=None, metavar="PATH",
+                        help="write the same records as a Chrome trace "
+                             "(chrome://tracing or ui.perfetto.dev)")
+    args = parser.parse_args()
+    if args.epochs < 1:
+        parser.error("--epochs must be at least 1")
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.chunksize:
+        # streaming trains one-vs-all full-chunk gradient descent only
+        unsupported = [flag for flag, used in [
+            ("--mode softmax", args.mode != "ova"), ("--solver", args.solver != "gd"),
+            ("--jobs", args.jobs != 1), ("--batch-size", args.batch_size is not None),
+            ("--shuffle", args.shuffle), ("--grad-tol", args.grad_tol is not None),
+            ("--compare", args.compare), ("--parity", args.parity)] if used]
+        if unsupported:
+            parser.error(f"--chunksize cannot be combined with {', '.join(unsupported)}")
+    return args
+
+
+def training_options(args, solver="gd"):
+    """
+    Extract the options of a solver from the parsed arguments.
+
+    Options left unset on the command line are not forwarded, so the
+    solver defaults apply.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        solver (str): "gd" (also used by the softmax trainer), "newton" or "lbfgs".
+
+    Returns:
+        dict: Keyword arguments for the solver.
+    """
+    if solver == "gd":
+        names = ["epochs", "lr", "batch_size", "shuffle", "schedule", "decay",
+                 "step_size", "tol", "grad_tol", "seed"]
+    else:
+        names = ["max_iter", "tol", "grad_tol"]
+    options = {name: getattr(args, name) for name in names}
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def train_run(X, labels, classes, mode, solver, args, recorder=None):
+    """
+    Train a model with a mode and solver and measure its wall time.
+
+    Args:
+        X (list of list of float): Normalized input features.
+        labels (list of str): Class label of each sample.
+        classes (list of str): Sorted list of class names.
+        mode (str): "ova" or "softmax".
+        solver (str): Solver of the one-vs-all classifiers.
+        args (argparse.Namespace): The parsed arguments.
+        recorder (telemetry.TrainingRecorder or None): Records the epochs of
+            the run, tagged with its name.
+
+    Returns:
+        tuple: classifiers (dict), history (dict), elapsed time in seconds (float)
+    """
+    if recorder is not None:
+        recorder.begin(f"{mode}/{solver}" if mode == "ova" else mode)
+    start = time.perf_counter()
+    if mode == "ova":
+        classifiers, history = train_one_vs_all(X, labels, classes, jobs=args.jobs,
+                                                solver=solver, recorder=recorder,
+                                                **training_options(args, solver))
+    else:
+        classifiers, history = TRAINERS[mode](X, labels, classes, recorder=recorder,
+                                              **training_options(args))
+    return classifiers, history, time.perf_counter() - start
+
+
+def parity_check(X, labels, classes, mode, solver, args):
+    """
+    Train the same model in float64 and in float32 on the same split, and
+    compare their predictions on the held out rows.
+
+    Each model is normalized, trained and scored in its own dtype, through
+    the same inference code as a saved model.
+
+    Args:
+        X (np.ndarray): Raw float64 features, missing scores replaced by 0.0.
+        labels (list of str): Class label of each sample.
+        classes (list of str): Sorted list of class names.
+        mode (str): "ova" or "softmax".
+        solver (str): Solver of the one-vs-all classifiers.
+        args (argparse.Namespace): The parsed arguments (holdout, seed, ...).
+
+    Returns:
+        dict: dtype -> {"time", "accuracy"}, plus "agreement" (fraction of
+            holdout rows predicted alike) and "holdout" (number of rows)
+    """
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(X))
+    n_holdout = max(1, int(len(X) * args.holdout))
+    test, train = order[:n_holdout], order[n_holdout:]
+    labels = np.asarray(labels)
+
+    report, predictions = {"holdout": n_holdout}, {}
+    for dtype in ("float64", "float32"):
+        X_train, means, stds = normalize_array(X[train].astype(dtype), dtype)
+        classifiers, _, elapsed = train_run(X_train, labels[train].tolist(), classes,
+                                            mode, solver, args)
+        W, b, model_classes = stack_classifiers(classifiers)
+        model = {"classes": model_classes, "weights": W.astype(dtype),
+                 "bias": b.astype(dtype), "mean": np.asarray(means, dtype=dtype),
+                 "std": np.asarray(stds, dtype=dtype), "mode": mode}
+        predictions[dtype] = predict(X[test], model)
+        report[dtype] = {"time": elapsed,
+                         "accuracy": float(np.mean(predictions[dtype] == labels[test]))}
+    report["agreement"] = float(np.mean(predictions["float64"] == predictions["float32"]))
+    return report
+
+
+def write_telemetry(recorder, args):
+    """
+    Print where the training time went and write the telemetry files.
+
+    Args:
+        recorder (telemetry.TrainingRecorder): The records of the training.
+        args (argparse.Namespace): The parsed arguments (telemetry, trace).
+    """
+    print(f"{'run':<14}{'class':<12}{'epochs':>8}{'time (s)':>10}{'samples/s':>12}"
+          f"{'grad norm':>11}")
+    for (run, c), entry in recorder.summary().items():
+        rate = entry["samples_per_s"]
+        print(f"{run:<14}{c:<12}{entry['epochs']:>8}{entry['seconds']:>10.3f}"
+              f"{rate if rate is not None else float('nan'):>12.3g}{entry['grad_norm']:>11.2e}")
+    if args.telemetry:
+        recorder.write_jsonl(args.telemetry)
+        print(f"Telemetry written to {args.telemetry}")
+    if args.trace:
+        recorder.write_chrome_trace(args.trace)
+        print(f"Trace written to {args.trace}")
+
+
+def main_streaming(args):
+    """
+    Out-of-core training: computes the normalization parameters in a first
+    pass, trains over the chunks of the csv, then evaluates in a last pass.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+    """
+    means, stds, classes, features = stream_normalization_params(args.dataset, args.chunksize)
+
+    options = {name: getattr(args, name)
+               for name in ["epochs", "lr", "schedule", "decay", "step_size", "tol"]}
+    recorder = TrainingRecorder() if args.telemetry or args.trace else None
+    if recorder is not None:
+        recorder.begin("streaming")
+    start = time.perf_counter()
+    classifiers, history = train_streaming(args.dataset, classes, means, stds,
+                                           chunksize=args.chunksize, dtype=args.dtype,
+                                           recorder=recorder, **options)
+    elapsed = time.perf_counter() - start
+
+    accuracy, counts = stream_breakdown(args.dataset, args.chunksize, means, stds, classifiers)
+    for c, info in history.items():
+        print(f"{c}: {info['iterations']} epochs, loss {info['loss']:.4f}")
+    print(f"Training time (streaming): {elapsed:.3f}s")
+    print(f"Training accuracy: {accuracy:.2%}")
+    if recorder is not None:
+        write_telemetry(recorder, args)
+
+    save_model(classifiers, features, means, stds, dtype=args.dtype, mode="ova")
+    plot_breakdown(counts)
 
 
 def main():
@@ -148,61 +1116,80 @@ def main():
     Main training function: loads data, trains model, evaluates, and saves results.
     """
     try:
-        assert len(sys.argv) == 2,\
-                "Invalid number of arguments.\nUsage: python logreg_train.py <data.csv>"
-        data = load(sys.argv[1])
+        args = parse_args()
+        if args.chunksize:
+            return main_streaming(args)
+        # the parity check needs the float64 values as a reference
+        data = load(args.dataset, float32=args.dtype == "float32" and not args.parity)
 
-        # Select only numeric features
+        # Select only numeric features, missing scores count as 0.0
         X_df = data.iloc[:, 6:]
-        X = X_df.values.tolist()
+        X = np.nan_to_num(X_df.to_numpy(dtype=np.float64 if args.parity else args.dtype),
+                          nan=0.0)
 
         # Get target labels
-        labels = data.loc[X_df.index, "Hogwarts House"].tolist()
+        labels = data["Hogwarts House"].tolist()
         classes = sorted(set(labels))
-        X = [[0.0 if pd.isna(xij) else xij for xij in xi] for xi in X]
 
-        X = normalize(X)
+        if args.parity:
+            mode, solver = args.mode, args.solver if args.mode == "ova" else "gd"
+            report = parity_check(X, labels, classes, mode, solver, args)
+            print(f"Parity check on a holdout of {report['holdout']} rows:")
+            print(f"{'dtype':<10}{'time (s)':>10}{'accuracy':>10}")
+            for dtype in ("float64", "float32"):
+                print(f"{dtype:<10}{report[dtype]['time']:>10.3f}"
+                      f"{report[dtype]['accuracy']:>10.2%}")
+            difference = report["float32"]["accuracy"] - report["float64"]["accuracy"]
+            print(f"accuracy difference: {difference * 100:+.2f} points, "
+                  f"prediction agreement: {report['agreement']:.2%}")
+
+        X, means, stds = normalize_array(X, args.dtype)
 
-        # Train one-vs-all classifiers
-        classifiers = {}
-        for c in classes:
-            y_c = [1 if label == c else 0 for label in labels]
-            w, b = train_logistic_regression(X, y_c, epochs=1000, lr=0.1)
-            classifiers[c] = (w, b)
+        if args.compare:
+            runs = [("ova", solver) for solver in SOLVERS] + [("softmax", "gd")]
+        else:
+            runs = [(args.mode, args.solver if args.mode == "ova" else "gd")]
+        recorder = TrainingRecorder() if args.telemetry or args.trace else None
+        results = {}
+        for mode, solver in runs:
+            classifiers, history, elapsed = train_run(X, labels, classes, mode, solver, args,
+                                                      recorder)
 
-        # Make predictions on the training set
-        y_pred = [predict_class(xi, classifiers) for xi in X]
+            # Make predictions on the training set
+            y_pred = predict_classes(X, *stack_classifiers(classifiers))
+            results[(mode, solver)] = (classifiers, history, y_pred, elapsed,
+                                       float(np.mean(y_pred == np.asarray(labels))))
 
-        # Compute accuracy
-        correct = sum(1 for a, b in zip(labels, y_pred) if a == b)
-        accuracy = correct / len(labels)
+        if args.compare:
+            print(f"{'mode':<16}{'time (s)':>10}{'accuracy':>10}{'iterations':>12}"
+                  f"{'passes':>8}{'loss':>10}")
+            for (mode, solver), (_, history, _, elapsed, accuracy) in results.items():
+                name = f"{mode}/{solver}" if mode == "ova" else mode
+                iterations = sum(info["iterations"] for info in history.values())
+                passes = sum(info["evaluations"] for info in history.values())
+                loss = Mean([info["loss"] for info in history.values()])
+                if mode == "softmax":
+                    # a single model shared by all classes
+                    iterations //= len(history)
+                    passes //= len(history)
+                print(f"{name:<16}{elapsed:>10.3f}{accuracy:>10.2%}{iterations:>12}"
+                      f"{passes:>8}{loss:>10.4f}")
+
+        selected = (args.mode, args.solver if args.mode == "ova" else "gd")
+        classifiers, history, y_pred, elapsed, accuracy = results[selected]
+        unit = "epochs" if selected[1] == "gd" else "iterations"
+        for c, info in history.items():
+            print(f"{c}: {info['iterations']} {unit}, loss {info['loss']:.4f}")
+        print(f"Training time ({'/'.join(selected)}): {elapsed:.3f}s")
         print(f"Training accuracy: {accuracy:.2%}")
+        if recorder is not None:
+            write_telemetry(recorder, args)
 
-        # Save classifiers
-        save_classifiers(classifiers)
+        # Save classifiers and normalization parameters
+        save_model(classifiers, list(X_df.columns), means, stds, dtype=args.dtype,
+                   mode=args.mode)
 
-        # Prepare prediction breakdown
-        counts = {c: [0, 0] for c in classes}
-        for true, pred in zip(labels, y_pred):
-            if true == pred:
-                counts[true][0] += 1
-            else:
-                counts[pred][1] += 1
-
-        # Visualization
-        labels_x = list(counts.keys())
-        corrects = [v[0] for v in counts.values()]
-        errors = [v[1] for v in counts.values()]
-
-        bar_width = 0.35
-        x = range(len(labels_x))
-
-        plt.bar(x, corrects, width=bar_width, label="Correct", color='green')
-        plt.bar([i + bar_width for i in x], errors, width=bar_width, label="Incorrect", color='red')
-        plt.xticks([i + bar_width / 2 for i in x], labels_x)
-        plt.title("Prediction Breakdown by Class")
-        plt.legend()
-        plt.show()
+        plot_breakdown(count_breakdown(labels, y_pred, classes))
     except KeyboardInterrupt:
         sys.stderr.write("\ninteruption...\nbye!!!\n")
         exit(1)
@@ -213,4 +1200,3 @@ if __name__ == "__main__":
         main()
     except Exception as e:
         print(e)
-
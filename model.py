@@ -0,0 +1,156 @@
+"""
+Single versioned binary artifact holding a trained logistic regression model:
+weight matrix, biases, class order, feature names and normalization vectors.
+
+File layout:
+    magic        8 bytes   b"DSLRMDL\\0"
+    version      uint32    little endian
+    header size  uint32    little endian
+    header       JSON      classes, features, dtype, mode ("ova" or "softmax",
+                           absent in older files meaning "ova") and the
+                           offset and shape of each array
+    padding      up to a multiple of 64 bytes
+    arrays       weights (K x D), bias (K), mean (D), std (D), raw little endian
+
+Loading maps the file in memory: the arrays are views on the mapping, so no
+number is parsed or copied whatever the size of the model.
+"""
+
+import json
+import mmap
+import struct
+import numpy as np
+
+
+MAGIC = b"DSLRMDL\x00"
+VERSION = 1
+MODEL_FILE = "model.dslr"
+MODES = ["ova", "softmax"]
+ALIGNMENT = 64
+ARRAYS = ["weights", "bias", "mean", "std"]
+_PREFIX = struct.Struct("<8sII")
+
+
+def _align(offset):
+    """
+    Round an offset up to the next multiple of ALIGNMENT.
+
+    Parameters:
+        offset (int): A byte offset.
+
+    Returns:
+        int: The aligned offset.
+    """
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_model(classifiers, features, means, stds, filename=MODEL_FILE, dtype="float64",
+               mode="ova"):
+    """
+    Write a trained model and its normalization parameters to a single binary file.
+
+    Parameters:
+        classifiers (dict): Dictionary of class to (weights, bias), in class order.
+        features (list of str): Names of the features, in column order.
+        means (list of float): The mean value of each feature.
+        stds (list of float): The standard deviation of each feature.
+        filename (str): Output file name (default: "model.dslr").
+        dtype (str): Storage type of the arrays (default: "float64").
+        mode (str): "ova" for one-vs-all binary classifiers, "softmax" for a
+            multinomial model; tells which function turns scores into probabilities.
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown model mode '{mode}'")
+    dtype = np.dtype(dtype).newbyteorder("<")
+    classes = list(classifiers)
+    arrays = {
+        "weights": np.array([classifiers[c][0] for c in classes], dtype=dtype),
+        "bias": np.array([classifiers[c][1] for c in classes], dtype=dtype),
+        "mean": np.asarray(means, dtype=dtype),
+        "std": np.asarray(stds, dtype=dtype),
+    }
+    if arrays["weights"].shape[1:] != (len(features),) \
+            or arrays["mean"].shape != (len(features),) \
+            or arrays["std"].shape != (len(features),):
+        raise ValueError("weights and normalization parameters do not match the features")
+
+    # offsets are relative to the start of the data section
+    layout = {}
+    offset = 0
+    for name in ARRAYS:
+        layout[name] = {"offset": offset, "shape": list(arrays[name].shape)}
+        offset = _align(offset + arrays[name].nbytes)
+    header = json.dumps({
+        "classes": classes,
+        "features": list(features),
+        "dtype": dtype.str,
+        "mode": mode,
+        "arrays": layout,
+    }).encode()
+    data_start = _align(_PREFIX.size + len(header))
+
+    with open(filename, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for name in ARRAYS:
+            f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(arrays[name].tobytes())
+
+
+def load_model(filename=MODEL_FILE, features=None):
+    """
+    Map a model file in memory.
+
+    Parameters:
+        filename (str): Path to the model file (default: "model.dslr").
+        features (list of str): If given, the feature names of the data to
+            score: loading fails unless they match the model schema.
+
+    Returns:
+        dict: {"version", "classes", "features", "mode", "weights" (K x D),
+            "bias" (K), "mean" (D), "std" (D)}, arrays being read-only views on the file.
+
+    Raises:
+        ValueError: If the file is not a model, has an unsupported version,
+            is truncated, or does not match the given features.
+    """
+    with open(filename, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapping) < _PREFIX.size:
+        raise ValueError(f"{filename}: not a model file")
+    magic, version, header_size = _PREFIX.unpack_from(mapping)
+    if magic != MAGIC:
+        raise ValueError(f"{filename}: not a model file")
+    if version != VERSION:
+        raise ValueError(f"{filename}: unsupported model version {version}")
+    header = json.loads(mapping[_PREFIX.size:_PREFIX.size + header_size])
+
+    if features is not None and list(features) != header["features"]:
+        missing = [f for f in header["features"] if f not in features]
+        unexpected = [f for f in features if f not in header["features"]]
+        raise ValueError(f"{filename}: feature schema mismatch "
+                         f"(missing: {missing}, unexpected: {unexpected})")
+
+    dtype = np.dtype(header["dtype"])
+    data_start = _align(_PREFIX.size + header_size)
+    model = {"version": version, "classes": header["classes"], "features": header["features"],
+             "mode": header.get("mode", "ova")}
+    if model["mode"] not in MODES:
+        raise ValueError(f"{filename}: unknown model mode '{model['mode']}'")
+    for name in ARRAYS:
+        spec = header["arrays"][name]
+        count = int(np.prod(spec["shape"]))
+        offset = data_start + spec["offset"]
+        if offset + count * dtype.itemsize > len(mapping):
+            raise ValueError(f"{filename}: truncated model file")
+        model[name] = np.frombuffer(mapping, dtype=dtype, count=count,
+                                    offset=offset).reshape(spec["shape"])
+
+    n_classes, n_features = len(model["classes"]), len(model["features"])
+    if model["weights"].shape != (n_classes, n_features) \
+            or model["bias"].shape != (n_classes,) \
+            or model["mean"].shape != (n_features,) \
+            or model["std"].shape != (n_features,):
+        raise ValueError(f"{filename}: inconsistent array shapes")
+    return model
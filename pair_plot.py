@@ -1,17 +1,33 @@
 """
-This script generates a Seaborn pairplot of course features from the Hogwarts dataset.
+This script generates a pairplot of course features from the Hogwarts dataset.
 Clicking on any scatter plot opens a focused scatter plot for the selected feature pair,
-grouped by Hogwarts house.
+grouped by Hogwarts house. Those drill-downs are rendered once and kept in a
+memory-bounded cache, and the most correlated pairs can be pre-rendered in a
+background process.
+
+Two renderers are available: the Seaborn pairplot draws every point, while the
+density renderer bins each feature pair into per-house 2D histograms and draws
+them as images, so its cost hardly depends on the number of rows.
 
 Usage:
-    python pair_plot.py dataset_train.csv
+    python pair_plot.py dataset_train.csv [--renderer density] [--max-points 500] [--headless]
 """
 
 
+import argparse
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgb
+from matplotlib.figure import Figure
 import sys
+from scatter_plot import correlation_matrix, top_pairs
 from utils import load
 
 
@@ -21,17 +37,218 @@ house_colors = {
     "Ravenclaw": "#0F1D4A",
     "Slytherin": "#1A472A"
 }
+missing_house_color = "#808080"
+
+
+def group_by_house(data, columns, house_col='Hogwarts House'):
+    """
+    Split the feature columns by house once, as NumPy arrays.
+
+    Parameters:
+        data (pd.DataFrame): The dataset with the feature and house columns.
+        columns (list of str): The features to keep.
+        house_col (str): Column name for the house grouping.
+
+    Returns:
+        dict: house -> feature matrix of its students (n_house x p), in house order.
+    """
+    return {house: group[columns].to_numpy(dtype=float)
+            for house, group in data.groupby(house_col)}
+
+
+def render_drill_down(groups, position, x_col, y_col, figsize=(8, 6), dpi=100):
+    """
+    Render the scatter plot of a feature pair, grouped by house, off screen
+    with the Agg canvas.
+
+    Parameters:
+        groups (dict): house -> feature matrix, see group_by_house().
+        position (dict): feature -> column of the matrices.
+        x_col (str): Feature on the x axis.
+        y_col (str): Feature on the y axis.
+        figsize (tuple): Size of the figure in inches.
+        dpi (int): Resolution of the image.
+
+    Returns:
+        np.ndarray: The rendered RGBA image (height x width x 4).
+    """
+    x, y = position[x_col], position[y_col]
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    for house, values in groups.items():
+        ax.scatter(values[:, x],
+                    values[:, y],
+                    label=house,
+                    color=house_colors.get(house, None),
+                    alpha=0.8,
+                    s=60)
+    ax.set_xlabel(x_col)
+    ax.set_ylabel(y_col)
+    ax.set_title(f"{y_col} vs {x_col}")
+    ax.legend()
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba()).copy()
+
+
+# state of the pre-rendering process, set once by its initializer
+_worker = {}
+
+
+def _init_prerender_worker(groups, position, figsize, dpi):
+    """
+    Initializer of the pre-rendering process: keep the data to plot, so
+    that it is sent once and not with every pair.
+    """
+    _worker.update(groups=groups, position=position, figsize=figsize, dpi=dpi)
 
 
-def on_click(event, axes_map, data, house_col='Hogwarts House'):
+def _prerender_pair(x_col, y_col):
+    """
+    Render a drill-down in the pre-rendering process.
+    """
+    return render_drill_down(_worker["groups"], _worker["position"], x_col, y_col,
+                             _worker["figsize"], _worker["dpi"])
+
+
+class DrillDownCache:
+    """
+    Least recently used cache of rendered drill-down scatter plots.
+
+    A drill-down is kept as an RGBA image keyed by (x_col, y_col). Once the
+    images exceed max_bytes, the least recently shown ones are evicted.
+
+    Matplotlib is not thread-safe (fonts, among others, are shared between
+    figures), so drill-downs are only rendered by the main thread, on a
+    cache miss, or by a separate process for pre-rendering.
+    """
+
+    def __init__(self, groups, columns, max_bytes=64 * 2 ** 20, figsize=(8, 6), dpi=100):
+        self.groups = groups
+        self.position = {col: i for i, col in enumerate(columns)}
+        self.max_bytes = max_bytes
+        self.figsize = figsize
+        self.dpi = dpi
+        self.images = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # guards the images only: pre-rendered images are stored from the
+        # result thread of the pre-rendering pool
+        self.lock = threading.Lock()
+
+    def render(self, x_col, y_col):
+        """
+        Render the scatter plot of a feature pair, see render_drill_down().
+
+        Parameters:
+            x_col (str): Feature on the x axis.
+            y_col (str): Feature on the y axis.
+
+        Returns:
+            np.ndarray: The rendered RGBA image (height x width x 4).
+        """
+        return render_drill_down(self.groups, self.position, x_col, y_col,
+                                 self.figsize, self.dpi)
+
+    def get(self, x_col, y_col):
+        """
+        Return the image of a feature pair, rendering it unless it is cached.
+
+        Parameters:
+            x_col (str): Feature on the x axis.
+            y_col (str): Feature on the y axis.
+
+        Returns:
+            np.ndarray: The rendered RGBA image.
+        """
+        key = (x_col, y_col)
+        with self.lock:
+            if key in self.images:
+                self.hits += 1
+                self.images.move_to_end(key)
+                return self.images[key]
+            self.misses += 1
+        image = self.render(x_col, y_col)
+        self.put(key, image)
+        return image
+
+    def put(self, key, image):
+        """
+        Store an image and evict the least recently used ones beyond max_bytes.
+
+        Parameters:
+            key (tuple): (x_col, y_col).
+            image (np.ndarray): The rendered image.
+        """
+        with self.lock:
+            if key in self.images:
+                self.size -= self.images.pop(key).nbytes
+            self.images[key] = image
+            self.size += image.nbytes
+            while self.size > self.max_bytes and len(self.images) > 1:
+                _, evicted = self.images.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def prerender(self, pairs):
+        """
+        Render feature pairs in a separate process, most likely first. Each
+        image is cached as soon as it is ready; a pair clicked before is
+        rendered by the main thread as usual.
+
+        Parameters:
+            pairs (list of tuple): (x_col, y_col) pairs to render.
+
+        Returns:
+            ProcessPoolExecutor: The pool, to shut down once the plots are closed.
+        """
+        # spawn: a forked child would inherit the state of the GUI toolkit
+        pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_prerender_worker,
+            initargs=(self.groups, self.position, self.figsize, self.dpi))
+
+        def store(future, key):
+            if not future.cancelled() and future.exception() is None:
+                self.put(key, future.result())
+
+        for key in pairs:
+            with self.lock:
+                cached = key in self.images
+            if not cached:
+                future = pool.submit(_prerender_pair, *key)
+                future.add_done_callback(lambda future, key=key: store(future, key))
+        return pool
+
+
+def likely_pairs(data, columns, count):
+    """
+    Choose the feature pairs most likely to be clicked: the most correlated
+    ones, where the pair plot shows structure worth a closer look.
+
+    Parameters:
+        data (pd.DataFrame): The dataset.
+        columns (list of str): The plotted features.
+        count (int): Number of pairs (each pair gives both orientations).
+
+    Returns:
+        list of tuple: (x_col, y_col) pairs, most likely first.
+    """
+    corr = correlation_matrix(data[columns].to_numpy(dtype=float), pairwise=True)
+    pairs = []
+    for col1, col2, _ in top_pairs(corr, columns, count):
+        pairs += [(col1, col2), (col2, col1)]
+    return pairs
+
+
+def on_click(event, axes_map, cache):
     """
     Callback function triggered on a mouse click inside a scatter plot.
 
     Parameters:
         event (MouseEvent): The matplotlib event object.
         axes_map (dict): A mapping from subplot axes to (x_col, y_col) feature names.
-        data (pd.DataFrame): The dataset used for plotting.
-        house_col (str): Column name for the house grouping (default: 'Hogwarts House').
+        cache (DrillDownCache): The rendered drill-down plots.
 
     Side effects:
         - Opens a new window with a focused scatter plot of the clicked feature pair.
@@ -47,29 +264,198 @@ def on_click(event, axes_map, data, house_col='Hogwarts House'):
             return
 
         x_col, y_col = key
+        image = cache.get(x_col, y_col)
 
-        # plot graph
-        fig, ax = plt.subplots(figsize=(8, 6))
-        for house, group in data.groupby(house_col):
-            color = house_colors.get(house, None)
-            ax.scatter(group[x_col],
-                        group[y_col],
-                        label=house,
-                        color=color,
-                        alpha=0.8,
-                        s=60)
-        ax.set_xlabel(x_col)
-        ax.set_ylabel(y_col)
-        ax.set_title(f"{y_col} vs {x_col}")
-        ax.legend()
+        # show the rendered graph at its own size
+        height, width = image.shape[:2]
+        fig = plt.figure(figsize=(width / cache.dpi, height / cache.dpi), dpi=cache.dpi)
+        fig.figimage(image)
         plt.show()
 
     except Exception as e:
         print(f"on_click error: {e}")
 
+
+def bin_features(X, bins):
+    """
+    Assign every value of every feature to one of `bins` equal-width bins.
+
+    Parameters:
+        X (np.ndarray): Feature matrix (n x p), NaN for missing values.
+        bins (int): Number of bins per feature.
+
+    Returns:
+        tuple: bin index of each value (n x p, -1 for NaN),
+            bin edges of each feature (p x bins + 1)
+    """
+    low, high = np.nanmin(X, axis=0), np.nanmax(X, axis=0)
+    high = np.where(high > low, high, low + 1)  # constant feature: one wide bin
+    edges = low + (high - low) * np.linspace(0, 1, bins + 1)[:, None]
+    with np.errstate(invalid="ignore"):
+        index = np.floor((X - low) / (high - low) * bins)
+    index = np.clip(np.nan_to_num(index, nan=-1), -1, bins - 1).astype(np.int64)
+    return index, edges.T
+
+
+def density_image(counts, colors):
+    """
+    Turn per-house 2D histograms into one RGBA image: the color of a cell
+    is the mix of the house colors weighted by their counts, its opacity
+    grows with the log of the total count.
+
+    Parameters:
+        counts (np.ndarray): Counts per house and cell (H x bins x bins).
+        colors (np.ndarray): RGB color of each house (H x 3).
+
+    Returns:
+        np.ndarray: The image (bins x bins x 4).
+    """
+    total = counts.sum(axis=0)
+    image = np.ones(total.shape + (4,))
+    with np.errstate(invalid="ignore"):
+        image[..., :3] = np.tensordot(counts, colors, axes=(0, 0)) / total[..., None]
+    image[..., :3] = np.nan_to_num(image[..., :3], nan=1.0)
+    image[..., 3] = np.log1p(total) / max(np.log1p(total.max()), 1e-12)
+    return image
+
+
+def density_pair_plot(data, columns, house_col='Hogwarts House', bins=64, max_points=0, seed=42):
+    """
+    Draw a pair plot where each scatter panel is a rasterized per-house density image.
+
+    Every feature is binned once. For each pair, the per-house 2D histograms
+    on the shared edges come from a single bincount over (house, x bin, y bin)
+    codes, so drawing a panel costs the same whatever the number of rows.
+
+    Parameters:
+        data (pd.DataFrame): The dataset with the feature and house columns.
+        columns (list of str): The features to plot.
+        house_col (str): Column name for the house grouping.
+        bins (int): Number of bins per feature.
+        max_points (int): If positive, also draw at most this many sampled
+            points on each panel.
+        seed (int): Seed of the point sampling.
+
+    Returns:
+        tuple: the figure, and a mapping from scatter axes to (x_col, y_col)
+    """
+    X = data[columns].to_numpy(dtype=float)
+    house, houses = pd.factorize(data[house_col], sort=True)
+    house = np.where(house < 0, len(houses), house)  # rows without a house
+    names = list(houses) + ["Unknown"]
+    colors = np.array([to_rgb(house_colors.get(h, missing_house_color)) for h in names])
+    n_houses = len(names)
+    index, edges = bin_features(X, bins)
+    rng = np.random.default_rng(seed)
+
+    p = len(columns)
+    fig, axes = plt.subplots(p, p, figsize=(1.6 * p, 1.6 * p), squeeze=False)
+    axes_map = {}
+    for i, y_col in enumerate(columns):
+        for j, x_col in enumerate(columns):
+            ax = axes[i, j]
+            ax.set_xticks([])
+            ax.set_yticks([])
+            if i == p - 1:
+                ax.set_xlabel(x_col, fontsize=7)
+            if j == 0:
+                ax.set_ylabel(y_col, fontsize=7)
+            if i == j:
+                valid = index[:, j] >= 0
+                counts = np.bincount(house[valid] * bins + index[valid, j],
+                                     minlength=n_houses * bins).reshape(n_houses, bins)
+                for h in range(n_houses):
+                    if counts[h].any():
+                        ax.stairs(counts[h], edges[j], color=colors[h], fill=True, alpha=0.5)
+                continue
+            valid = (index[:, i] >= 0) & (index[:, j] >= 0)
+            codes = (house[valid] * bins + index[valid, i]) * bins + index[valid, j]
+            counts = np.bincount(codes, minlength=n_houses * bins * bins)
+            ax.imshow(density_image(counts.reshape(n_houses, bins, bins), colors),
+                      origin="lower", aspect="auto", interpolation="nearest",
+                      extent=(edges[j][0], edges[j][-1], edges[i][0], edges[i][-1]))
+            if max_points > 0:
+                rows = np.flatnonzero(valid)
+                if len(rows) > max_points:
+                    rows = rng.choice(rows, max_points, replace=False)
+                ax.scatter(X[rows, j], X[rows, i], c=colors[house[rows]], s=1,
+                           linewidths=0, rasterized=True)
+            axes_map[ax] = (x_col, y_col)
+    fig.subplots_adjust(wspace=0.05, hspace=0.05)
+    return fig, axes_map
+
+
+def seaborn_pair_plot(subset, columns, house_col='Hogwarts House', max_points=0, seed=42):
+    """
+    Draw a Seaborn pair plot of every point.
+
+    Parameters:
+        subset (pd.DataFrame): The feature and house columns.
+        columns (list of str): The features to plot.
+        house_col (str): Column name for the house grouping.
+        max_points (int): If positive, plot a random sample of at most this many rows.
+        seed (int): Seed of the row sampling.
+
+    Returns:
+        tuple: the figure, and a mapping from scatter axes to (x_col, y_col)
+    """
+    import seaborn as sns
+
+    if 0 < max_points < len(subset):
+        subset = subset.sample(max_points, random_state=seed)
+    g = sns.pairplot(subset,
+                        hue=house_col,
+                        diag_kind="hist",
+                        corner=False,
+                        palette=house_colors,
+                        plot_kws={"alpha": 0.8, "s": 5})
+
+    # Create map: ax -> (x_col, y_col)
+    axes_map = {}
+    for i, y_col in enumerate(columns):
+        for j, x_col in enumerate(columns):
+            if i == j:
+                continue  # ignore diag (histograms)
+            try:
+                ax = g.axes[i, j]
+                axes_map[ax] = (x_col, y_col)
+            except IndexError:
+                continue
+    return g.fig, axes_map
+
+
+def parse_args():
+    """
+    Parse the command-line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Pair plot of the course features.")
+    parser.add_argument("dataset", help="path to the dataset CSV file")
+    parser.add_argument("--renderer", choices=["seaborn", "density"], default="seaborn",
+                        help="seaborn draws every point, density draws binned "
+                             "per-house densities (default: seaborn)")
+    parser.add_argument("--bins", type=int, default=64,
+                        help="bins per feature of the density renderer (default: 64)")
+    parser.add_argument("--max-points", type=int, default=0,
+                        help="per-panel cap of plotted points: sampled rows for seaborn, "
+                             "points drawn over the densities for density (default: 0, "
+                             "all rows for seaborn, none for density)")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the point sampling")
+    parser.add_argument("--cache-mb", type=float, default=64,
+                        help="memory bound of the cached drill-down plots (default: 64)")
+    parser.add_argument("--prerender", type=int, default=0,
+                        help="render the drill-downs of the N most correlated pairs "
+                             "in the background (default: 0)")
+    parser.add_argument("--headless", action="store_true",
+                        help="only write img/pair_plot.png, without opening a window")
+    return parser.parse_args()
+
+
 def main():
     """
-    Main execution function. Loads the dataset and generates a Seaborn pairplot
+    Main execution function. Loads the dataset and generates a pairplot
     for all numerical course features, grouped by Hogwarts house.
 
     Side effects:
@@ -78,42 +464,43 @@ def main():
         - Saves the pairplot image to 'img/pair_plot.png'.
         - Registers a click event to generate individual plots on demand.
     """
+    args = parse_args()
+    if args.headless:
+        plt.switch_backend("Agg")
 
     try:
-        assert len(sys.argv) == 2, "Invalid number of parameters"
-        data: pd.DataFrame = load(sys.argv[1])
+        data: pd.DataFrame = load(args.dataset)
+        assert data is not None, f"cannot load {args.dataset}"
 
         house_col = 'Hogwarts House'
         assert house_col in data.columns, f"Missing column '{house_col}' in data"
 
-        columns = data.columns[6:]
+        columns = list(data.columns[6:])
         subset = data[columns].copy()
         subset[house_col] = data[house_col]
 
-        g = sns.pairplot(subset,
-                            hue=house_col,
-                            diag_kind="hist",
-                            corner=False,
-                            palette=house_colors,
-                            plot_kws={"alpha": 0.8, "s": 5})
-
-        fig = g.fig
-
-        # Create map: ax -> (x_col, y_col)
-        axes_map = {}
-        for i, y_col in enumerate(columns):
-            for j, x_col in enumerate(columns):
-                if i == j:
-                    continue  # ignore diag (histograms)
-                try:
-                    ax = g.axes[i, j]
-                    axes_map[ax] = (x_col, y_col)
-                except IndexError:
-                    continue
-
-        fig.canvas.mpl_connect('button_press_event', lambda event: on_click(event, axes_map, subset, house_col))
-        plt.savefig("img/pair_plot.png")
-        plt.show()
+        if args.renderer == "density":
+            fig, axes_map = density_pair_plot(subset, columns, house_col, args.bins,
+                                              args.max_points, args.seed)
+        else:
+            fig, axes_map = seaborn_pair_plot(subset, columns, house_col,
+                                              args.max_points, args.seed)
+
+        os.makedirs("img", exist_ok=True)
+        fig.savefig("img/pair_plot.png")
+        if args.headless:
+            return
+        cache = DrillDownCache(group_by_house(subset, columns, house_col), columns,
+                               max_bytes=int(args.cache_mb * 2 ** 20))
+        pool = None
+        if args.prerender > 0:
+            pool = cache.prerender(likely_pairs(subset, columns, args.prerender))
+        fig.canvas.mpl_connect('button_press_event', lambda event: on_click(event, axes_map, cache))
+        try:
+            plt.show()
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
 
     except Exception as e:
         print(f"Error: {e}")
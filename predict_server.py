@@ -0,0 +1,324 @@
+"""
+Long-running prediction service: loads the model once and serves predictions
+over HTTP on a local TCP port or a Unix socket.
+
+Concurrent requests are collected into micro-batches, scored with a single
+matrix product, and answered as soon as the batch is full or the oldest
+request has waited long enough.
+
+Endpoints:
+    POST /predict   {"rows": [[score, ...], ...], "proba": false}
+                    rows are lists in the model feature order, or objects keyed
+                    by feature name; null or missing scores count as 0.0
+                    -> {"houses": [...], "probabilities": [[...], ...]}
+    GET  /stats     latency percentiles and throughput counters
+    GET  /health    {"status": "ok"}
+
+Usage:
+    python predict_server.py [--port 8000 | --unix /tmp/dslr.sock]
+"""
+
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+import numpy as np
+from inference import load_model, predict, MODEL_FILE
+
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class Stats:
+    """
+    Latency and throughput counters of the service.
+
+    Latencies of the last `window` requests are kept to compute percentiles.
+    """
+
+    def __init__(self, window=10000):
+        self.started = time.perf_counter()
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+
+    def record_request(self, rows, latency):
+        """
+        Record a served request.
+
+        Parameters:
+            rows (int): Number of rows scored for the request.
+            latency (float): Time between reception and answer, in seconds.
+        """
+        self.requests += 1
+        self.rows += rows
+        self.latencies.append(latency)
+
+    def summary(self):
+        """
+        Summarize the counters.
+
+        Returns:
+            dict: Counters, throughput and latency percentiles in milliseconds.
+        """
+        uptime = time.perf_counter() - self.started
+        summary = {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "rows": self.rows,
+            "batches": self.batches,
+            "errors": self.errors,
+            "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            "requests_per_s": self.requests / uptime,
+            "rows_per_s": self.rows / uptime,
+        }
+        if self.latencies:
+            p50, p90, p99, p999 = np.percentile(np.array(self.latencies) * 1000,
+                                                [50, 90, 99, 99.9])
+            summary["latency_ms"] = {"p50": p50, "p90": p90, "p99": p99, "p99.9": p999,
+                                     "max": max(self.latencies) * 1000}
+        return summary
+
+
+class MicroBatcher:
+    """
+    Collect the rows of concurrent requests and score them together.
+
+    A batch is scored when it holds max_batch rows, or max_wait seconds after
+    its first request arrived, whichever comes first.
+    """
+
+    def __init__(self, model, stats, max_batch=256, max_wait=0.002):
+        self.model = model
+        self.stats = stats
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+
+    async def predict(self, X):
+        """
+        Queue rows for the next batch and wait for their predictions.
+
+        Parameters:
+            X (np.ndarray): Raw features (N x D).
+
+        Returns:
+            tuple: predicted houses (np.ndarray), probabilities (np.ndarray)
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((X, future))
+        return await future
+
+    async def run(self):
+        """
+        Batching loop, to be run as a background task.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            rows = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+            self.score(pending)
+
+    def score(self, pending):
+        """
+        Score a batch and resolve the futures of its requests.
+
+        Parameters:
+            pending (list): (features, future) of each request of the batch.
+        """
+        try:
+            houses, proba = predict(np.vstack([X for X, _ in pending]), self.model,
+                                    return_proba=True)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.stats.batches += 1
+        start = 0
+        for X, future in pending:
+            if not future.done():
+                future.set_result((houses[start:start + len(X)], proba[start:start + len(X)]))
+            start += len(X)
+
+
+def parse_rows(rows, features):
+    """
+    Convert the rows of a request into a feature matrix.
+
+    Parameters:
+        rows (list): Lists of scores in feature order, or objects keyed by feature.
+        features (list of str): Feature names of the model.
+
+    Returns:
+        np.ndarray: The feature matrix (N x D), NaN for missing scores.
+    """
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("'rows' must be a non-empty list")
+    table = [[row.get(f) for f in features] if isinstance(row, dict) else row
+             for row in rows]
+    X = np.array(table, dtype=float)
+    if X.ndim != 2 or X.shape[1] != len(features):
+        raise ValueError(f"each row must have {len(features)} scores")
+    return X
+
+
+class PredictionServer:
+    """
+    Minimal HTTP/1.1 server (keep-alive, Content-Length bodies) around a MicroBatcher.
+    """
+
+    def __init__(self, model, max_batch=256, max_wait=0.002):
+        self.model = model
+        self.stats = Stats()
+        self.batcher = MicroBatcher(model, self.stats, max_batch, max_wait)
+
+    async def handle(self, reader, writer):
+        """
+        Serve the requests of a connection until the client closes it.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                received = time.perf_counter()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, payload, rows = await self.route(request_line.decode("latin-1"), body)
+                if status == 200 and rows:
+                    self.stats.record_request(rows, time.perf_counter() - received)
+                elif status != 200:
+                    self.stats.errors += 1
+
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, request_line, body):
+        """
+        Dispatch a request to its endpoint.
+
+        Parameters:
+            request_line (str): e.g. "POST /predict HTTP/1.1".
+            body (bytes): The request body.
+
+        Returns:
+            tuple: HTTP status (int), JSON payload, number of rows scored (int)
+        """
+        try:
+            method, path, _ = request_line.split(" ", 2)
+        except ValueError:
+            return 400, {"error": "malformed request line"}, 0
+        if path == "/health":
+            return 200, {"status": "ok"}, 0
+        if path == "/stats":
+            return 200, self.stats.summary(), 0
+        if path != "/predict":
+            return 404, {"error": f"unknown path {path}"}, 0
+        if method != "POST":
+            return 405, {"error": "use POST"}, 0
+        try:
+            request = json.loads(body)
+            X = parse_rows(request.get("rows"), self.model["features"])
+        except (ValueError, TypeError, AttributeError) as e:
+            return 400, {"error": str(e)}, 0
+        try:
+            houses, proba = await self.batcher.predict(X)
+        except Exception as e:
+            return 500, {"error": str(e)}, 0
+        payload = {"houses": houses.tolist()}
+        if request.get("proba"):
+            payload["probabilities"] = proba.tolist()
+        return 200, payload, len(X)
+
+    async def serve(self, host="127.0.0.1", port=8000, unix=None):
+        """
+        Start the batching task and serve forever.
+
+        Parameters:
+            host (str): Address to listen on.
+            port (int): TCP port to listen on.
+            unix (str): Path of a Unix socket to listen on instead of TCP.
+        """
+        batching = asyncio.create_task(self.batcher.run())
+        if unix:
+            if os.path.exists(unix):
+                os.remove(unix)
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+            print(f"Serving predictions on unix:{unix}")
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            print(f"Serving predictions on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batching.cancel()
+
+
+def main():
+    """
+    Load the model once and serve predictions until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Serve house predictions over HTTP.")
+    parser.add_argument("--model", default=MODEL_FILE,
+                        help=f"model file (default: {MODEL_FILE})")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--unix", default=None, help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="rows per micro-batch (default: 256)")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="maximum time a request waits for its batch to fill (default: 2)")
+    args = parser.parse_args()
+    try:
+        server = PredictionServer(load_model(args.model), args.max_batch, args.max_wait_ms / 1000)
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.stderr.write("\ninteruption...\nbye!!!\n")
+        exit(1)
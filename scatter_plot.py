@@ -1,13 +1,15 @@
 """
 This script analyzes a dataset to find and visualize the two most correlated features.
-It computes Pearson correlation coefficients for all pairs of numerical features
-and generates a scatter plot for the most correlated pair.
+It computes the correlation matrix of all numerical features at once (Pearson,
+or Spearman on ranks) and generates a scatter plot for the most correlated pair.
 
 Usage:
-    python scatter_plot.py dataset_train.csv
+    python scatter_plot.py dataset_train.csv [--method spearman] [--pairwise] [--top-k 5]
 """
 
 
+import argparse
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import sys
@@ -55,6 +57,101 @@ def pearson_corr(X, Y):
     return cov / (std_X * std_Y)
 
 
+def rank_columns(X):
+    """
+    Replace the values of each column by their ranks (1 to n, ties sharing
+    their average rank), NaN staying NaN.
+
+    Parameters:
+        X (np.ndarray): Matrix of values (n x p).
+
+    Returns:
+        np.ndarray: Matrix of ranks (n x p).
+    """
+    ranks = np.full(X.shape, np.nan)
+    for j in range(X.shape[1]):
+        present = np.flatnonzero(~np.isnan(X[:, j]))
+        values = X[present, j]
+        order = np.argsort(values, kind="stable")
+        ordered = values[order]
+        # first and last position of each run of equal values
+        starts = np.r_[True, ordered[1:] != ordered[:-1]]
+        group = np.cumsum(starts) - 1
+        first = np.flatnonzero(starts)
+        last = np.r_[first[1:], len(ordered)] - 1
+        ranks[present[order], j] = (first + last)[group] / 2 + 1
+    return ranks
+
+
+def correlation_matrix(X, method="pearson", pairwise=False):
+    """
+    Compute the correlation coefficient of every pair of columns at once.
+
+    With complete observations (default), rows holding a NaN are dropped and
+    the matrix is a single product of the standardized columns. With pairwise
+    observations, each pair uses every row where both columns are present:
+    the counts, sums and sums of squares restricted to those rows are all
+    obtained from products with the presence mask.
+
+    Parameters:
+        X (np.ndarray): Matrix of values (n x p), NaN for missing values.
+        method (str): "pearson", or "spearman" for the Pearson correlation of ranks.
+            In pairwise mode, each column is ranked over all its own values.
+        pairwise (bool): Use pairwise-complete instead of complete observations.
+
+    Returns:
+        np.ndarray: The correlation matrix (p x p), NaN where a column is constant
+            or where there is no observation.
+    """
+    X = np.asarray(X, dtype=float)
+    if not pairwise:
+        X = X[~np.isnan(X).any(axis=1)]
+        if not len(X):
+            return np.full((X.shape[1], X.shape[1]), np.nan)
+    if method == "spearman":
+        X = rank_columns(X)
+    elif method != "pearson":
+        raise ValueError(f"unknown correlation method '{method}'")
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if not pairwise:
+            centered = X - X.mean(axis=0)
+            Z = centered / np.sqrt((centered ** 2).sum(axis=0))
+            corr = Z.T @ Z
+        else:
+            present = (~np.isnan(X)).astype(float)
+            # shifting by the column means keeps the raw sums small
+            values = np.nan_to_num(X - np.nanmean(X, axis=0))
+            n = present.T @ present
+            sums = values.T @ present              # sum of x_i where x_j is present
+            squares = (values ** 2).T @ present
+            products = values.T @ values
+            cov = n * products - sums * sums.T
+            var = n * squares - sums ** 2
+            corr = cov / np.sqrt(var * var.T)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def top_pairs(corr, columns, k=1):
+    """
+    Find the k pairs of features with the strongest correlation (in absolute value).
+    Pairs whose coefficient is undefined (NaN) are left out.
+
+    Parameters:
+        corr (np.ndarray): Correlation matrix (p x p).
+        columns (list of str): Name of each feature.
+        k (int): Number of pairs to return.
+
+    Returns:
+        list: (feature, feature, coefficient) tuples, strongest first.
+    """
+    i, j = np.triu_indices(len(columns), k=1)
+    coefs = corr[i, j]
+    defined = np.flatnonzero(~np.isnan(coefs))
+    order = defined[np.argsort(-np.abs(coefs[defined]), kind="stable")][:k]
+    return [(columns[i[o]], columns[j[o]], float(coefs[o])) for o in order]
+
+
 def best_coef(coefs: dict):
     """
     Find the pair of features with the strongest correlation (in absolute value).
@@ -73,51 +170,70 @@ def best_coef(coefs: dict):
     return best
 
 
-def scatter_plot(data: pd.DataFrame):
+def scatter_plot(data: pd.DataFrame, method="pearson", pairwise=False, top_k=1):
     """
-    Compute Pearson correlations between all feature pairs in the dataset,
+    Compute the correlations between all feature pairs in the dataset,
     identify the most similar pair, and display a scatter plot for that pair.
 
     Parameters:
         data (pd.DataFrame): The input DataFrame containing the dataset.
+        method (str): "pearson" or "spearman".
+        pairwise (bool): Use pairwise-complete observations instead of
+            dropping every row with a missing score.
+        top_k (int): Number of most similar pairs to print.
 
     Side effects:
         - Displays and saves a scatter plot of the most correlated feature pair.
-        - Prints correlation coefficients and the most similar feature pair.
+        - Prints the most similar feature pairs.
     """
     try:
-        data = data.iloc[:, 6:]
-        data = data.dropna()
-
-        coefs = {}
-        columns = data.columns
-
-        # Calculate correlations for each pair
-        for i in range(len(columns)):
-            for j in range(i + 1, len(columns)):
-                col1 = columns[i]
-                col2 = columns[j]
-                coef = pearson_corr(data[col1], data[col2])
-                coefs[f"{col1} - {col2}"] = coef
-
-        # Find most similar pair : abs(value) closer to 1
-        best_pair = best_coef(coefs)
-        print(f"Most similar features: {best_pair[0]} with correlation = {best_pair[1]:.4f}")
-        col1, col2 = best_pair[0].split(" - ")
-        
+        data = data.iloc[:, 6:].select_dtypes("number")
+        columns = list(data.columns)
+
+        corr = correlation_matrix(data.to_numpy(dtype=float), method, pairwise)
+        pairs = top_pairs(corr, columns, top_k)
+        assert pairs, "no pair of features to correlate"
+        for col1, col2, coef in pairs:
+            print(f"{col1} - {col2}: {coef}")
+
+        # Most similar pair : abs(value) closer to 1
+        col1, col2, coef = pairs[0]
+        print(f"Most similar features: {col1} - {col2} with correlation = {coef:.4f}")
+        shown = data[[col1, col2]].dropna() if pairwise else data.dropna()
+
         plt.figure(num="Most similar features")
         plt.title("Most similar features")
-        
-        plt.scatter(data[col1], data[col2])
+
+        plt.scatter(shown[col1], shown[col2])
         plt.xlabel(col1)
         plt.ylabel(col2)
 
+        os.makedirs("img", exist_ok=True)
         plt.savefig("img/similar_features.png")
         plt.show()
 
     except Exception as e:
         print(f"Error: {e}")
-    
+
+
+def parse_args():
+    """
+    Parse the command-line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Find and plot the two most similar features.")
+    parser.add_argument("dataset", help="path to the dataset CSV file")
+    parser.add_argument("--method", choices=["pearson", "spearman"], default="pearson",
+                        help="correlation coefficient (default: pearson)")
+    parser.add_argument("--pairwise", action="store_true",
+                        help="use every row where both features are present, "
+                             "instead of only the rows without missing scores")
+    parser.add_argument("--top-k", type=int, default=1,
+                        help="number of most similar pairs to print (default: 1)")
+    return parser.parse_args()
+
 
 def main():
     """
@@ -127,16 +243,12 @@ def main():
     Side effects:
         - Loads a CSV file specified via command-line.
         - Calls scatter_plot() on the loaded data.
-        - Prints error messages in case of incorrect usage or failure.
+        - Prints error messages in case of failure.
     """
-    try:
-        assert len(sys.argv) == 2, "Usage: python scatter_plot.py dataset_train.csv"
-
-        data = load(sys.argv[1])
-        if data is not None:
-            scatter_plot(data)
-    except AssertionError as e:
-        print("AssertionError:", e)
+    args = parse_args()
+    data = load(args.dataset)
+    if data is not None:
+        scatter_plot(data, args.method, args.pairwise, args.top_k)
 
 
 if __name__ == "__main__":
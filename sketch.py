@@ -0,0 +1,139 @@
+"""
+KLL quantile sketch (Karnin, Lang, Liberty, 2016): approximate quantiles of a
+stream in one pass and bounded memory, mergeable across chunks and processes.
+
+The sketch keeps a hierarchy of compactors. Items of level h stand for 2**h
+original values; when a level is over capacity it is sorted and every other
+item (random offset) is promoted to the next level. Level capacities shrink
+geometrically from the top, so memory is O(k) whatever the stream length and
+the rank error of a quantile stays within about 3 / k of the count.
+"""
+
+
+import math
+import numpy as np
+
+
+def k_for_error(eps):
+    """
+    Choose the sketch size giving a normalized rank error of about eps.
+
+    Parameters:
+        eps (float): Target rank error, as a fraction of the count (e.g. 0.01).
+
+    Returns:
+        int: The k parameter of KLLSketch.
+    """
+    return max(8, math.ceil(3 / eps))
+
+
+class KLLSketch:
+    """
+    Mergeable approximate-quantile sketch of a stream of floats.
+
+    Parameters:
+        k (int): Capacity of the top compactor; the rank error is within about 3 / k.
+        seed (int or None): Seed of the random compaction offsets.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.min = math.nan
+        self.max = math.nan
+
+    def _capacity(self, level):
+        """
+        Capacity of a level: k at the top, shrinking by 2/3 per level below.
+        """
+        depth = len(self.levels) - 1 - level
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        """
+        Compact the lowest level over capacity until every level fits.
+        """
+        while True:
+            level = next((h for h, items in enumerate(self.levels)
+                          if len(items) > self._capacity(h)), None)
+            if level is None:
+                return
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # an odd item out stays at its level
+            leftover, items = items[:len(items) % 2], items[len(items) % 2:]
+            promoted = items[self.rng.integers(2)::2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            self.levels[level] = leftover
+
+    def update(self, values):
+        """
+        Add values to the sketch, NaN being ignored.
+
+        Parameters:
+            values (array-like): The values of a chunk of the stream.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one, as if it had seen both streams.
+
+        Parameters:
+            other (KLLSketch): Sketch of another part of the stream.
+
+        Returns:
+            KLLSketch: self.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.count += other.count
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """
+        Estimate quantiles with the index rule of describe.Q1/Q3: the value of
+        rank int(count * q) of the sorted values, counted from 0.
+
+        Parameters:
+            qs (list of float): Quantiles between 0 and 1.
+
+        Returns:
+            np.ndarray: The estimated values, NaN if the sketch is empty.
+        """
+        qs = np.asarray(qs, dtype=float)
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** h)
+                                  for h, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        # first item whose cumulative weight goes beyond the wanted rank
+        ranks = np.floor(self.count * qs)
+        index = np.searchsorted(cumulative, ranks, side="right")
+        estimates = items[np.minimum(index, len(items) - 1)]
+        estimates = np.where(qs <= 0, self.min, estimates)
+        return np.where(qs >= 1, self.max, estimates)
+
+    def __len__(self):
+        """
+        Number of items retained by the sketch (its memory footprint).
+        """
+        return sum(len(items) for items in self.levels)
@@ -0,0 +1,175 @@
+"""
+Training telemetry: per-epoch records of the training loops, exported as
+JSON lines or as a Chrome trace (chrome://tracing, https://ui.perfetto.dev).
+
+The trainers of logreg_train.py take an optional `callback`, called once per
+epoch (or solver iteration) with a dict:
+    {"epoch": int, "loss": float, "grad_norm": float, "lr": float,
+     "samples": int, "seconds": float}
+where seconds is the time spent training during the epoch, the loss and
+gradient evaluations made for the callback excluded. Without a callback the
+loops skip these evaluations and the timing entirely.
+
+Usage:
+    recorder = TrainingRecorder()
+    train_logistic_regression(X, y, callback=recorder.callback("Gryffindor"))
+    recorder.write_jsonl("telemetry.jsonl")
+    recorder.write_chrome_trace("trace.json")
+"""
+
+
+import json
+import os
+import time
+
+
+def collect(records, **fields):
+    """
+    Build a callback appending the records of a training loop to a list.
+
+    Each record is stamped with the wall-clock time at which it was received,
+    the process id and its throughput, so that records collected in worker
+    processes can be merged with the others.
+
+    Parameters:
+        records (list): List the records are appended to.
+        **fields: Fields added to every record (e.g. the class name).
+
+    Returns:
+        callable: The callback, taking the record dict of an epoch.
+    """
+    pid = os.getpid()
+
+    def callback(record):
+        seconds = record["seconds"]
+        record.update(fields)
+        record["end"] = time.time()
+        record["pid"] = pid
+        record["samples_per_s"] = record["samples"] / seconds if seconds > 0 else None
+        records.append(record)
+
+    return callback
+
+
+class TrainingRecorder:
+    """
+    Collect the epoch records of one or more trainings.
+
+    Records are tagged with the class being trained and with the current run
+    (e.g. "ova/gd"), set by begin(), so that the runs of a comparison stay apart.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.run = None
+
+    def begin(self, run):
+        """
+        Tag the records that follow with a run name.
+
+        Parameters:
+            run (str): Name of the run, e.g. "ova/gd".
+        """
+        self.run = run
+
+    def callback(self, name):
+        """
+        Callback recording the epochs of a class.
+
+        Parameters:
+            name (str or None): Class trained by the loop; None when the loop
+                sets "class" itself in its records.
+
+        Returns:
+            callable: A callback for the trainers of logreg_train.py.
+        """
+        fields = {"run": self.run}
+        if name is not None:
+            fields["class"] = name
+        return collect(self.records, **fields)
+
+    def extend(self, name, records):
+        """
+        Add records collected elsewhere (e.g. in a worker process) for a class.
+
+        Parameters:
+            name (str): Class trained by the loop.
+            records (list of dict): Records built by a collect() callback.
+        """
+        for record in records:
+            record.update({"class": name, "run": self.run})
+            self.records.append(record)
+
+    def summary(self):
+        """
+        Aggregate the records per run and class.
+
+        Returns:
+            dict: (run, class) -> {"epochs": int, "seconds": float,
+                "samples_per_s": float, "loss": final loss, "grad_norm": final norm}
+        """
+        summary = {}
+        for record in self.records:
+            key = (record["run"], record["class"])
+            entry = summary.setdefault(key, {"epochs": 0, "seconds": 0.0, "samples": 0})
+            entry["epochs"] += 1
+            entry["seconds"] += record["seconds"]
+            entry["samples"] += record["samples"]
+            entry["loss"] = record["loss"]
+            entry["grad_norm"] = record["grad_norm"]
+        for entry in summary.values():
+            samples = entry.pop("samples")
+            entry["samples_per_s"] = samples / entry["seconds"] if entry["seconds"] > 0 else None
+        return summary
+
+    def write_jsonl(self, path):
+        """
+        Write the records as JSON lines, one epoch per line.
+
+        Parameters:
+            path (str): Path of the file.
+        """
+        with open(path, "w") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+    def chrome_trace(self):
+        """
+        Convert the records into Chrome trace events: one complete event per
+        epoch on a thread per run and class, and a counter of the loss.
+
+        Returns:
+            dict: The trace, {"traceEvents": [...], "displayTimeUnit": "ms"}
+        """
+        if not self.records:
+            return {"traceEvents": [], "displayTimeUnit": "ms"}
+        origin = min(record["end"] - record["seconds"] for record in self.records)
+        threads, names, events = {}, {}, []
+        for record in self.records:
+            key = (record["pid"], record["run"], record["class"])
+            if key not in threads:
+                threads[key] = len(threads) + 1
+                names[key] = " ".join(str(part) for part in key[1:] if part is not None)
+                events.append({"name": "thread_name", "ph": "M", "pid": key[0],
+                               "tid": threads[key], "args": {"name": names[key]}})
+            start = (record["end"] - record["seconds"] - origin) * 1e6
+            events.append({
+                "name": f"epoch {record['epoch']}", "cat": "train", "ph": "X",
+                "pid": key[0], "tid": threads[key], "ts": start,
+                "dur": record["seconds"] * 1e6,
+                "args": {field: record[field]
+                         for field in ("loss", "grad_norm", "lr", "samples", "samples_per_s")},
+            })
+            events.append({"name": f"loss {names[key]}", "ph": "C", "pid": key[0], "ts": start,
+                           "args": {"loss": record["loss"]}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        """
+        Write the records as a Chrome trace, see chrome_trace().
+
+        Parameters:
+            path (str): Path of the file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
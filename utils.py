@@ -1,16 +1,311 @@
+import hashlib
+import io
+import json
 import os
-import pandas as pd
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+import numpy as np
 
+if TYPE_CHECKING:  # pandas is only imported when a csv is read
+    import pandas as pd
 
-def load(path: str, index_column=None) -> pd.DataFrame:
-    '''Load a csv file into DataFrame from pandas with a column index ->
- default set to None'''
+
+DATASET_CACHE = ".cache/datasets"
+CACHE_VERSION = 2  # bumped whenever the cached layout or the schema changes
+PARALLEL_MIN_BYTES = 32 * 2 ** 20
+
+COURSES = [
+    "Arithmancy", "Astronomy", "Herbology", "Defense Against the Dark Arts",
+    "Divination", "Muggle Studies", "Ancient Runes", "History of Magic",
+    "Transfiguration", "Potions", "Care of Magical Creatures", "Charms", "Flying"]
+
+# declared type of the dataset columns; other columns are inferred
+SCHEMA = {
+    "Index": "int64",
+    "Hogwarts House": "category",
+    "First Name": "str",
+    "Last Name": "str",
+    "Birthday": "str",
+    "Best Hand": "category",
+    **{course: "float64" for course in COURSES},
+}
+
+
+def resolve_path(path: str) -> str:
+    '''Resolve a path relative to the directory of the scripts (absolute
+ paths are kept as they are)'''
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, path)
+
+
+def file_hash(path: str) -> str:
+    '''SHA-256 of the content of a file, read by blocks'''
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2 ** 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_compressed(path: str) -> bool:
+    '''Whether pandas will decompress the file, judging by its extension'''
+    return path.endswith((".gz", ".bz2", ".zip", ".xz", ".zst", ".tar"))
+
+
+def _split_ranges(path: str, parts: int):
+    '''Split the rows of a csv file into byte ranges of about the same size,
+ each starting at the beginning of a line (the header is skipped)'''
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        bounds = [f.tell()]
+        for i in range(1, parts):
+            f.seek(max(bounds[-1], size * i // parts))
+            f.readline()
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _parse_range(path: str, start: int, end: int, names, usecols, dtype):
+    '''Parse the rows of a byte range of a csv file'''
+    import pandas as pd
+    with open(path, "rb") as f:
+        f.seek(start)
+        buffer = f.read(end - start)
+    return pd.read_csv(io.BytesIO(buffer), header=None, names=names,
+                       usecols=usecols, dtype=dtype)
+
+
+def read_header(path: str):
+    '''Column names of a csv file, without reading its rows'''
+    import pandas as pd
+    return list(pd.read_csv(resolve_path(path), nrows=0).columns)
+
+
+def parse_csv(path: str, columns=None, jobs=None):
+    '''Parse a csv file with the declared types of SCHEMA, keeping only the
+ given columns (all by default).
+
+ Compressed files (.gz, .zst, ...) are decompressed on the fly. Large
+ uncompressed files are split into byte ranges parsed in parallel by jobs
+ processes (one per core by default); fields must not hold line breaks.'''
+    import pandas as pd
+    names = read_header(path)
+    usecols = names if columns is None else list(columns)
+    missing = [c for c in usecols if c not in names]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    # categories are set once all the rows are read, so that every part agrees
+    dtype = {c: SCHEMA[c] for c in usecols if c in SCHEMA and SCHEMA[c] != "category"}
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or _is_compressed(path) or os.path.getsize(path) < PARALLEL_MIN_BYTES:
+        data = pd.read_csv(path, usecols=usecols, dtype=dtype)
+    else:
+        ranges = _split_ranges(path, jobs)
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parts = pool.map(_parse_range, *zip(*[(path, start, end, names, usecols, dtype)
+                                                  for start, end in ranges]))
+            data = pd.concat(list(parts), ignore_index=True)
+    data = data[usecols]
+    for c in usecols:
+        if SCHEMA.get(c) == "category":
+            data[c] = data[c].astype("category")
+    return data
+
+
+def _cache_dirs():
+    '''Directory of the path index entries, and of the cached columns'''
+    root = resolve_path(DATASET_CACHE)
+    return os.path.join(root, "index"), os.path.join(root, "columns")
+
+
+def _write_columns(data, directory: str):
+    '''Write a DataFrame as one .npy file per numeric or categorical column
+ (categories as codes), and the other columns together in a JSON file,
+ into a new directory'''
+    tmp = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(tmp, exist_ok=True)
+    columns, strings = [], {}
+    for i, (name, column) in enumerate(data.items()):
+        if column.dtype == "category":
+            np.save(os.path.join(tmp, f"{i}.npy"), column.cat.codes.to_numpy())
+            columns.append({"name": name, "file": f"{i}.npy",
+                            "categories": column.cat.categories.tolist()})
+        elif column.dtype.kind in "biuf":
+            np.save(os.path.join(tmp, f"{i}.npy"), column.to_numpy())
+            columns.append({"name": name, "file": f"{i}.npy"})
+        else:
+            strings[name] = [None if value is None or value != value else value
+                             for value in column.tolist()]
+            columns.append({"name": name, "dtype": str(column.dtype)})
+    with open(os.path.join(tmp, "strings.json"), "w") as f:
+        json.dump(strings, f)
+    with open(os.path.join(tmp, "columns.json"), "w") as f:
+        json.dump(columns, f)
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        csv_path = os.path.join(script_dir, path)
+        os.replace(tmp, directory)
+    except OSError:  # written meanwhile by another process
+        shutil.rmtree(tmp, ignore_errors=True)
 
-        data = pd.read_csv(csv_path, index_col=index_column)
-        return data
-    except Exception:
+
+def _read_columns(directory: str, columns=None):
+    '''Rebuild a DataFrame from cached columns: numeric columns are
+ copy-on-write memory maps of the .npy files, not copies, and only the given
+ columns (all by default) are read. The frame is writable like a parsed one:
+ written pages are private to the process and never reach the cache files'''
+    import pandas as pd
+    with open(os.path.join(directory, "columns.json")) as f:
+        stored = {column["name"]: column for column in json.load(f)}
+    missing = [c for c in columns or [] if c not in stored]
+    if missing:
+        raise ValueError(f"missing columns {missing}")
+    strings = None
+    data = {}
+    for name in stored if columns is None else columns:
+        column = stored[name]
+        if "file" in column:
+            mapped = np.load(os.path.join(directory, column["file"]), mmap_mode="c")
+            values = mapped.view(np.ndarray)  # a plain array on the map
+            if "categories" in column:
+                values = pd.Categorical.from_codes(values, column["categories"])
+            data[name] = values
+        else:
+            if strings is None:
+                with open(os.path.join(directory, "strings.json")) as f:
+                    strings = json.load(f)
+            data[name] = pd.Series(strings[name], dtype=column["dtype"])
+    return pd.DataFrame(data, copy=False)
+
+
+def _read_entry(index_file: str):
+    '''Read an index entry, None if it is missing or unreadable'''
+    try:
+        with open(index_file) as f:
+            entry = json.load(f)
+        if all(isinstance(entry.get(key), kind) for key, kind in
+               (("size", int), ("mtime_ns", int), ("sha256", str))):
+            return entry
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+
+def cached_read_csv(path: str, columns=None, jobs=None):
+    '''Read a csv file through the columnar cache.
+
+ Entries are looked up by the path of the file, and stay valid as long as
+ its size and modification time are unchanged; otherwise the content is
+ hashed again, and parsed again only if it changed. Columns are stored
+ under the content hash, so identical files share them, and the columns of
+ a replaced content are deleted once no path refers to them anymore.
+
+ An unreadable entry or cached column (truncated, corrupted) is a cache
+ miss: the file is parsed again and the cache rewritten. Only the errors of
+ the caller are raised: missing file, missing columns, malformed csv.'''
+    index_dir, root = _cache_dirs()
+    key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()
+    index_file = os.path.join(index_dir, key + ".json")
+    stat = os.stat(path)
+    entry = _read_entry(index_file)
+    if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+        previous = entry
+        entry = {"path": os.path.abspath(path), "size": stat.st_size,
+                 "mtime_ns": stat.st_mtime_ns, "sha256": file_hash(path)}
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        with open(index_file + ".tmp", "w") as f:
+            json.dump(entry, f)
+        os.replace(index_file + ".tmp", index_file)
+        if previous is not None and previous["sha256"] != entry["sha256"]:
+            _drop_unreferenced(previous["sha256"])
+
+    directory = os.path.join(root, f"{entry['sha256']}.v{CACHE_VERSION}")
+    if not os.path.exists(directory):
+        _write_columns(parse_csv(path, jobs=jobs), directory)
+    try:
+        with open(os.path.join(directory, "columns.json")) as f:
+            names = [column["name"] for column in json.load(f)]
+    except (OSError, ValueError, KeyError, TypeError):
+        names = None
+    if names is not None:
+        missing = [c for c in columns or [] if c not in names]
+        if missing:
+            raise ValueError(f"{path}: missing columns {missing}")
+        try:
+            return _read_columns(directory, columns)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    # unreadable cached columns: parse the file again and replace them
+    shutil.rmtree(directory, ignore_errors=True)
+    _write_columns(parse_csv(path, jobs=jobs), directory)
+    return _read_columns(directory, columns)
+
+
+def _drop_unreferenced(sha256: str):
+    '''Delete the cached columns of a content no indexed path has anymore'''
+    index_dir, root = _cache_dirs()
+    for name in os.listdir(index_dir):
+        try:
+            with open(os.path.join(index_dir, name)) as f:
+                if json.load(f)["sha256"] == sha256:
+                    return
+        except (OSError, ValueError, KeyError):
+            continue
+    for name in os.listdir(root):
+        if name.startswith(sha256):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def read_dataset(path: str, columns=None, float32=False, index_column=None,
+                 cache=True, jobs=None) -> "pd.DataFrame":
+    '''Read a dataset with the declared types of SCHEMA.
+
+ Only the given columns (all by default) are read, in that order. Houses
+ are categorical, courses float64, or float32 if float32 is set. Unless
+ cache is False, the file is parsed once and then read back from the
+ columnar cache (see cached_read_csv).
+
+ Raises FileNotFoundError if there is no such file, ValueError if a
+ requested column is missing, and the parser errors of a malformed file.'''
+    path = resolve_path(path)
+    data = None
+    if cache:
+        try:
+            data = cached_read_csv(path, columns, jobs)
+        except ValueError:
+            raise  # missing columns or malformed csv, unreadable cache entries are misses
+        except OSError:
+            data = None  # no such file (raised by parse_csv) or read-only cache
+    if data is None:
+        data = parse_csv(path, columns, jobs)
+    if float32:
+        data = data.astype({c: "float32" for c in data.columns if data[c].dtype == "float64"})
+    if index_column is not None:
+        data = data.set_index(data.columns[index_column]
+                              if isinstance(index_column, int) else index_column)
+    return data
+
+
+def load(path: str, index_column=None, columns=None, float32=False,
+         cache=True) -> "pd.DataFrame":
+    '''Load a csv file into DataFrame from pandas with a column index ->
+ default set to None. See read_dataset for the other options; errors are
+ printed and None is returned'''
+    try:
+        return read_dataset(path, columns, float32, index_column, cache)
+    except FileNotFoundError:
         print(f"Error: no such a file or directory: {path}")
+    except Exception as e:
+        print(f"Error: cannot load {path}: {e}")
     return None
+
+
+def iter_chunks(path: str, chunksize: int):
+    '''Read a csv file chunk by chunk, yielding DataFrames of at most
+ chunksize rows, so that the whole file is never held in memory'''
+    import pandas as pd
+    with pd.read_csv(resolve_path(path), chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk